@@ -27,11 +27,21 @@ import io
 import wave
 import Levenshtein
 import threading
+import json
+import queue
+from websockets.sync.client import connect as ws_connect
+import paho.mqtt.client as mqtt
 
 
 # ================== 서버 설정 ==================
 VOICE_SERVER_URL = 'http://10.183.40.204:5000/voice'  # 음성 서버 URL
 GESTURE_SERVER_URL = 'http://10.183.40.204:5000/gesture'  # 제스처 서버 URL
+STREAM_SERVER_URL = 'ws://10.183.40.204:5000/ws'  # 제스처/음성 스트림(WebSocket) URL
+ROUTING_URL = 'http://10.183.40.204:5000/routing'  # 제스처 라우팅 스냅샷 URL
+ROUTING_REPORT_URL = 'http://10.183.40.204:5000/routing/report'  # 엣지 처리 결과 보고 URL
+MQTT_BROKER_HOST = '10.183.40.204'  # MQTT 브로커 (서버와 같은 LAN)
+MQTT_BROKER_PORT = 1883
+EDGE_ROUTING_ENABLED = True  # 제스처를 인식기에서 직접 MQTT로 전송
 USER_UID = "ot2SrPF7bcdGBpm2ACDyVDwkpPF2"  # 사용자 고유 ID (Firebase UID)
 
 # ================== 서버 전송 함수 ==================
@@ -79,7 +89,7 @@ def send_to_server(url, key, value, command_type=None):
         print(f"   응답 본문: '{response.text}'")
         print(f"   응답 길이: {len(response.text)} 문자")
         
-        if response.status_code == 200:
+        if response.status_code in (200, 202):  # 202 : 기기별 큐에 등록됨
             print(f" 전송 성공! 서버가 정상적으로 응답했습니다.")
             if response.text:
                 print(f" 서버 메시지: {response.text}")
@@ -106,6 +116,244 @@ def send_to_server(url, key, value, command_type=None):
     print("="*50)
 
 
+class ServerStream:
+    """서버와의 WebSocket 연결 유지 (이벤트 전송 / ack 수신 / 모드 변경 수신)
+
+    연결이 끊기면 백그라운드에서 재연결하며, 연결되지 않은 동안에는
+    send()가 False를 반환하므로 호출 측에서 HTTP 전송으로 대체한다.
+    """
+
+    def __init__(self, url, uid, reconnect_delay=2.0, max_reconnect_delay=30.0):
+        self.url = url
+        self.uid = uid
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.current_device = None
+        self.ws = None
+        self.running = False
+        self.thread = None
+        self.send_lock = threading.Lock()
+        self.next_id = 0
+        self.sent_at = {}  # 이벤트 id -> 전송 시각 (ack 지연 측정)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        ws = self.ws
+        if ws:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def is_connected(self):
+        return self.ws is not None
+
+    def send(self, key, value):
+        """이벤트 전송 (연결되어 있지 않으면 False)"""
+        ws = self.ws
+        if ws is None:
+            return False
+
+        with self.send_lock:
+            self.next_id += 1
+            event_id = self.next_id
+            try:
+                ws.send(json.dumps({"type": key, "id": event_id, "uid": self.uid, key: value}))
+                self.sent_at[event_id] = time.time()
+                return True
+            except Exception as e:
+                print(f" [스트림] 전송 실패, HTTP로 전환: {e}")
+                self.ws = None
+                return False
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while self.running:
+            try:
+                with ws_connect(self.url, open_timeout=5) as ws:
+                    ws.send(json.dumps({"type": "subscribe", "uid": self.uid}))
+                    self.ws = ws
+                    delay = self.reconnect_delay
+                    print(f" [스트림] 서버 연결됨: {self.url}")
+
+                    for raw in ws:
+                        self._handle(json.loads(raw))
+            except Exception as e:
+                if self.running:
+                    print(f" [스트림] 연결 끊김 ({type(e).__name__}), {delay:.0f}초 후 재연결")
+            self.ws = None
+            self.sent_at.clear()
+
+            if self.running:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _handle(self, message):
+        kind = message.get("type")
+        if kind == "mode":
+            self.current_device = message.get("current_device")
+            edge_router.set_current_device(self.current_device)
+            print(f" [스트림] 현재 모드: {self.current_device}")
+        elif kind == "ack":
+            sent = self.sent_at.pop(message.get("id"), None)
+            elapsed = f"{(time.time() - sent) * 1000:.0f}ms" if sent else "-"
+            print(f" [스트림 응답] 상태 코드: {message.get('status')} ({elapsed}) {message.get('message') or message.get('error', '')}")
+
+
+class EdgeRouter:
+    """서버 라우팅 스냅샷으로 제스처를 직접 해석해 MQTT 브로커로 전송
+
+    - 스냅샷은 ETag(If-None-Match)로 주기적으로 동기화
+    - 같은 기기 명령 사이 간격은 전송 워커 스레드에서 유지
+    - 모드 변경/전송 결과는 서버에 비동기로 보고 (상태 및 로그 기록용)
+    스냅샷이 없거나 브로커에 연결되지 않았으면 handle_gesture()가 False를 반환한다.
+    """
+
+    def __init__(self, routing_url, report_url, broker_host, broker_port, uid, sync_interval=10.0):
+        self.routing_url = routing_url
+        self.report_url = report_url
+        self.broker_host = broker_host
+        self.broker_port = broker_port
+        self.uid = uid
+        self.sync_interval = sync_interval
+        self.snapshot = None
+        self.etag = None
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        self.command_queue = queue.Queue()
+        self.report_queue = queue.Queue()
+        self.mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.mqtt_client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self.mqtt_client.connect_async(self.broker_host, self.broker_port)
+        self.mqtt_client.loop_start()
+        for target in (self._sync_loop, self._send_loop, self._report_loop):
+            threading.Thread(target=target, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self.mqtt_client.loop_stop()
+        self.mqtt_client.disconnect()
+
+    def sync(self):
+        """라우팅 스냅샷 동기화 (변경 없으면 304)"""
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        response = self.session.get(self.routing_url, params={"uid": self.uid}, headers=headers, timeout=5)
+        if response.status_code == 200:
+            with self.lock:
+                self.snapshot = response.json()
+                self.etag = response.headers.get("ETag")
+            print(f" [라우팅] 스냅샷 갱신 (version: {self.snapshot.get('version')})")
+
+    def set_current_device(self, device):
+        """서버에서 알려준 모드 변경 반영"""
+        with self.lock:
+            if self.snapshot is not None:
+                self.snapshot["current_device"] = device
+
+    def handle_gesture(self, gesture):
+        if not self.mqtt_client.is_connected():
+            return False
+
+        with self.lock:
+            if self.snapshot is None:
+                return False
+
+            current_device = self.snapshot.get("current_device")
+            selected_mode = self.snapshot.get("mode_gestures", {}).get(gesture)
+
+            # 모드 설정 (선택 / 해제 / 전환)
+            if selected_mode:
+                new_device = "null" if current_device == selected_mode else selected_mode
+                self.snapshot["current_device"] = new_device
+                self.report_queue.put({"uid": self.uid, "gesture": gesture, "current_device": new_device})
+                print(f" [라우팅] 모드: {current_device} -> {new_device}")
+                return True
+
+            if not current_device or current_device == "null":
+                print(" [라우팅] 현재 모드가 설정되어 있지 않습니다.")
+                return True
+
+            control_val = self.snapshot.get("controls", {}).get(current_device, {}).get(gesture)
+            if control_val is None:
+                print(f" [라우팅] 모드 '{current_device}'에 제스처 '{gesture}'가 없습니다.")
+                return True
+
+            interval = self.snapshot.get("gesture_interval", 0.3)
+            topic = self.snapshot.get("topic", "smartHome/metadata")
+
+        controls = control_val if isinstance(control_val, list) else [control_val]
+        self.command_queue.put((current_device, gesture, controls, interval, topic))
+        return True
+
+    def _sync_loop(self):
+        while self.running:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f" [라우팅] 스냅샷 동기화 실패: {e}")
+            time.sleep(self.sync_interval)
+
+    def _send_loop(self):
+        while self.running:
+            device, gesture, controls, interval, topic = self.command_queue.get()
+            sent = []
+            for i, c in enumerate(controls):
+                info = self.mqtt_client.publish(topic, json.dumps({"mode": device, "control": c}), qos=1)
+                try:
+                    info.wait_for_publish(timeout=3)
+                except (ValueError, RuntimeError) as e:
+                    print(f" [라우팅] MQTT 전송 실패 ({device}, {c}): {e}")
+                    break
+                if not info.is_published():
+                    print(f" [라우팅] MQTT 전달 확인 실패 ({device}, {c})")
+                    break
+                sent.append(c)
+                print(f" [라우팅] MQTT 전송: {device} / {c}")
+                if i < len(controls) - 1:
+                    time.sleep(interval)
+
+            if sent:
+                self.report_queue.put({"uid": self.uid, "gesture": gesture, "device": device, "controls": sent})
+
+    def _report_loop(self):
+        while self.running:
+            report = self.report_queue.get()
+            try:
+                self.session.post(self.report_url, json=report, timeout=5)
+            except Exception as e:
+                print(f" [라우팅] 결과 보고 실패: {e}")
+
+
+server_stream = ServerStream(STREAM_SERVER_URL, USER_UID)
+edge_router = EdgeRouter(ROUTING_URL, ROUTING_REPORT_URL, MQTT_BROKER_HOST, MQTT_BROKER_PORT, USER_UID)
+
+
+def dispatch_to_server(url, key, value, command_type=None):
+    """제스처는 엣지에서 직접 처리하고, 그 외에는 스트림 연결(없으면 HTTP)로 전송"""
+    if key == "gesture" and EDGE_ROUTING_ENABLED and edge_router.handle_gesture(value):
+        return
+    if server_stream.send(key, value):
+        return
+    threading.Thread(
+        target=send_to_server,
+        args=(url, key, value, command_type),
+        daemon=True
+    ).start()
+
+
 gesture_flip_map = {
     'clockwise': 'counter_clockwise',
     'counter_clockwise': 'clockwise'
@@ -124,21 +372,13 @@ def try_send_gesture(gesture):
 
     if flipped_gesture != last_sent_gesture:
         if now - last_sent_gesture_time >= gesture_delay:
-            threading.Thread(
-                target=send_to_server,
-                args=(GESTURE_SERVER_URL, "gesture", flipped_gesture),  # 제스처는 타입 필요 없음
-                daemon=True
-            ).start()
+            dispatch_to_server(GESTURE_SERVER_URL, "gesture", flipped_gesture)  # 제스처는 타입 필요 없음
             last_sent_gesture = flipped_gesture
             last_sent_gesture_time = now
             print(f"[제스처 전송] sent: {gesture} → {flipped_gesture}")
 
     elif now - last_sent_gesture_time >= gesture_resend:
-        threading.Thread(
-            target=send_to_server,
-            args=(GESTURE_SERVER_URL, "gesture", flipped_gesture),
-            daemon=True
-        ).start()
+        dispatch_to_server(GESTURE_SERVER_URL, "gesture", flipped_gesture)
         last_sent_gesture_time = now
         print(f"[제스처 전송] re-sent: {gesture} → {flipped_gesture}")
 
@@ -150,21 +390,13 @@ def try_send_voice(voice_command):
 
     if voice_command != last_sent_voice:
         if now - last_sent_voice_time >= voice_delay:
-            threading.Thread(
-                target=send_to_server,
-                args=(VOICE_SERVER_URL, "voice", voice_command, "voice"),
-                daemon=True
-            ).start()
+            dispatch_to_server(VOICE_SERVER_URL, "voice", voice_command, "voice")
             last_sent_voice = voice_command
             last_sent_voice_time = now
             print(f"[음성 전송] sent: {voice_command}")
 
     elif now - last_sent_voice_time >= voice_resend:
-        threading.Thread(
-            target=send_to_server,
-            args=(VOICE_SERVER_URL, "voice", voice_command, "voice"),
-            daemon=True
-        ).start()
+        dispatch_to_server(VOICE_SERVER_URL, "voice", voice_command, "voice")
         last_sent_voice_time = now
         print(f"[음성 전송] re-sent: {voice_command}")
 
@@ -1687,6 +1919,12 @@ def main():
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
     cap.set(cv2.CAP_PROP_FPS, 30)
     
+    # 서버 스트림 연결 (끊겨 있으면 HTTP로 전송)
+    print(" 서버 스트림 연결 중...")
+    server_stream.start()
+    if EDGE_ROUTING_ENABLED:
+        edge_router.start()
+
     # 음성 인식 스레드 시작
     print(" 음성 인식 스레드 초기화 중...")
     voice_thread = VoiceRecognitionThread(colab_url)
@@ -1818,6 +2056,9 @@ def main():
     
     finally:
         # 정리
+        server_stream.stop()
+        if EDGE_ROUTING_ENABLED:
+            edge_router.stop()
         voice_thread.stop()
         voice_thread.join(timeout=3)
         cap.release()
@@ -1,9 +1,18 @@
 from flask import Flask
 from flask_cors import CORS
-from firebase_admin import credentials, initialize_app, firestore
+from firebase_admin import credentials, initialize_app, get_app, firestore
 from .config import Config
 from flasgger import Swagger
 
+# firebase admin 초기화 (RTDB용), 이미 초기화된 경우 무시
+# 학습 프로세스(training_executor)에서도 호출
+def init_firebase():
+    try:
+        get_app()
+    except ValueError:
+        cred = credentials.Certificate("firebase_config.json")
+        initialize_app(cred, {'databaseURL' : Config.FIREBASE_DB_URL})
+
 def create_app():
     app = Flask(__name__)
     #Swagger(app)
@@ -11,20 +20,29 @@ def create_app():
 
     CORS(app)
 
-    # firebase admin 초기화 (RTDB용)
-    cred = credentials.Certificate("firebase_config.json")
-    initialize_app(cred, {'databaseURL' : app.config['FIREBASE_DB_URL']})
+    init_firebase()
 
     # firestore 초기화
     firestore_db = firestore.client()
     app.config['FIRESTORE_DB'] = firestore_db
 
+    # 사용 로그 write-behind 기록기 시작
+    from app.services.log_writer import log_writer
+    log_writer.start(firestore_db)
+
+    # 음성 명령 목록 캐시 (voice_list 실시간 반영)
+    from app.services.voice_catalog import voice_catalog
+    voice_catalog.start(firestore_db)
+
     from app.routes.gesture import gesture_bp
     from app.routes.voice import voice_bp
     from app.routes.status import status_bp
     from app.routes.dashboard import dashboard_bp
     from app.routes.recommand import recommand_bp
     from app.routes.ircode import ircode_bp
+    from app.routes.command import command_bp
+    from app.routes.stream import stream_bp, sock
+    from app.routes.routing import routing_bp
 
     app.register_blueprint(gesture_bp)
     app.register_blueprint(voice_bp)
@@ -32,5 +50,14 @@ def create_app():
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(recommand_bp)
     app.register_blueprint(ircode_bp)
+    app.register_blueprint(command_bp)
+    app.register_blueprint(stream_bp)
+    app.register_blueprint(routing_bp)
+    sock.init_app(app)
+
+    # 추천 결과 미리 계산 (상태/매핑/시간 구간 변경 시 백그라운드 갱신)
+    from app.routes.recommand import compute_recommendations, recommendation_bucket
+    from app.services.recommendation_cache import recommendation_cache
+    recommendation_cache.start(app, compute_recommendations, recommendation_bucket)
 
     return app
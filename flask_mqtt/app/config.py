@@ -1,3 +1,5 @@
+import os
+
 class Config:
     FIREBASE_DB_URL = "https://project1-96997-default-rtdb.asia-southeast1.firebasedatabase.app"
     #MQTT_BROKER = "172.20.10.11"
@@ -5,3 +7,77 @@ class Config:
     MQTT_BROKER = "localhost"
     MQTT_PORT = 1883
     MQTT_TOPIC = "smartHome/IR"
+    MQTT_QOS = 1
+    MQTT_MAX_INFLIGHT = 100  # 전달 확인을 기다리는 최대 메시지 수
+    MQTT_MAX_QUEUED = 1000  # 연결 끊김 동안 보관할 최대 메시지 수
+    MQTT_PUBLISH_TIMEOUT = 3  # 초
+
+    # 제스처 매핑 캐시 (uid 단위)
+    MAPPING_CACHE_MAX_USERS = 1000
+    MAPPING_CACHE_TTL = 60  # 초
+
+    # 명령 순차 전송 (uid, device 단위 큐)
+    COMMAND_WORKERS = 8
+    COMMAND_HISTORY_SIZE = 10000
+    GESTURE_COMMAND_INTERVAL = 0.3  # 초
+    VOICE_COMMAND_INTERVAL = 0.5  # 초
+
+    # 사용 로그 write-behind 기록
+    LOG_SPOOL_PATH = "log_spool.jsonl"
+    LOG_QUEUE_SIZE = 10000
+    LOG_BATCH_SIZE = 500  # firestore batch 최대 500건
+    LOG_FLUSH_INTERVAL = 2  # 초
+    LOG_COMMIT_TIMEOUT = 5  # 초
+    LOG_RETRY_INTERVAL = 30  # 초
+
+    # 기기 상태 엔진 (메모리 기준, rtdb는 비동기 반영)
+    STATE_MIRROR_INTERVAL = 0.5  # 초
+    STATE_MAX_DEVICES = 10000
+    STATE_TTL = 30  # 초, 이 시간이 지나면 rtdb에서 다시 불러옴 (앱/rtdb에서 직접 바꾼 상태 반영)
+
+    # 제스처/음성 배치 수신
+    BATCH_MAX_EVENTS = 500
+    BATCH_DEDUPE_WINDOW = 2.0  # 초
+
+    # 음성 명령 목록 (voice_list) 캐시
+    VOICE_CATALOG_TTL = 300  # 초, 실시간 리스너를 쓰지 못할 때 다시 읽는 주기
+
+    # 날씨 (OpenWeather)
+    OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "bde2733011591df872f6e37f11d51336")
+    WEATHER_TTL = 600  # 초
+    WEATHER_MAX_STALE = 3600  # 초, 이 시간 안이면 이전 값을 반환하고 백그라운드 갱신
+    WEATHER_HTTP_TIMEOUT = 3  # 초
+    WEATHER_REFRESH_INTERVAL = 60  # 초
+    WEATHER_ACTIVE_WINDOW = 6 * 3600  # 초, 최근 요청이 있었던 도시만 미리 갱신
+
+    # 사용자별 추천 모델
+    MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
+    MODEL_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 메모리에 올려 둘 모델 파일 크기 합계
+    MODEL_BACKEND = os.getenv("MODEL_BACKEND", "rf")  # "rf" (RandomForest pickle) / "compact" (빈도표, npz)
+
+    # 학습 데이터 로컬 캐시 (사용자별 npz shard, 새 로그만 firestore에서 조회)
+    FEATURE_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "feature_cache"))
+    FEATURE_CACHE_MAX_SHARDS = 32  # 넘으면 하나로 합침
+
+    # 모델 학습 프로세스 풀
+    TRAIN_WORKERS = int(os.getenv("TRAIN_WORKERS", max(1, (os.cpu_count() or 2) - 1)))  # 1이면 현재 프로세스에서 순차 학습
+    TRAIN_JOB_TIMEOUT = 600  # 초, 사용자 1명 학습 시간 제한
+    TRAIN_JOB_MEMORY_LIMIT = 1024 * 1024 * 1024  # 사용자 1명 학습 중 추가로 쓸 수 있는 메모리 (Linux)
+
+    # 모델 학습 작업 큐 (서버는 넣기만 하고 train_worker.py가 가져가 학습)
+    TRAIN_QUEUE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "train_queue.sqlite3"))
+    TRAIN_QUEUE_BATCH = 64  # worker가 한 번에 가져갈 최대 작업 수
+    TRAIN_QUEUE_POLL_INTERVAL = 5  # 초, 대기 작업이 없을 때 다시 확인하는 주기
+    TRAIN_QUEUE_LEASE = 120  # 초, 이 시간 동안 heartbeat가 없으면 worker가 종료된 것으로 보고 작업을 다시 대기 상태로
+    TRAIN_QUEUE_MAX_ATTEMPTS = 3  # worker 비정상 종료로 다시 대기 상태로 돌리는 최대 횟수
+    TRAIN_QUEUE_KEEP = 7 * 24 * 3600  # 초, 끝난 작업 기록 보관 기간
+    TRAIN_DIRTY_BACKFILL_MARKER = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "train_dirty_backfill.done"))  # train_dirty 도입 전 사용자 표시 완료 기록
+
+    # 추천 결과 미리 계산 (uid 단위)
+    RECOMMEND_MAX_USERS = 1000
+    RECOMMEND_WORKERS = 4
+    RECOMMEND_IO_WORKERS = 16  # 추천 1건 계산 시 동시 조회 (사용자당 최대 7개)
+    RECOMMEND_DEBOUNCE = 2  # 초, 상태/매핑 변경 후 다시 계산하기까지 대기 (연속 변경을 한 번에 반영)
+    RECOMMEND_BUCKET_CHECK = 60  # 초, 시간대(시각/일출/일몰/기온) 변경 확인 주기
+    RECOMMEND_ACTIVE_WINDOW = 6 * 3600  # 초, 최근 조회가 있었던 사용자만 미리 계산
+    RECOMMEND_MAX_FAILURES = 5  # 연속으로 다시 계산에 실패하면 캐시에서 제거 (다음 조회 때 계산)
@@ -1,14 +1,14 @@
 import os
-import json
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from firebase_admin import firestore
-from app.routes.recommand import train_model
+from app.config import Config
+from app.routes.recommand import TRAINED_LOG_COUNT_FIELD, LAST_TRAINED_FIELD, FEATURE_VERSION_FIELD
+from app.services.features import FEATURE_VERSION
+from app.services.train_queue import train_queue
+from app.services.log_writer import LOG_COUNT_FIELD, TRAIN_DIRTY_FIELD
 
-# 학습 상태 저장 경로
-STATE_PATH = "train_state.json"
-
-# 로그 수 기반 임계치 계산
+# 로그 수 기반 임계치 계산 (사용자별)
 def get_threshold(current_count):
     if current_count < 200:
         return 30
@@ -17,64 +17,90 @@ def get_threshold(current_count):
     else:
         return 200
 
-# 학습 상태 불러오기
-def load_train_state():
-    if not os.path.exists(STATE_PATH):
-        return {"last_count": 0, "last_trained_time": None}
-    with open(STATE_PATH, "r") as f:
-        return json.load(f)
+# 사용자 로그 수 카운터 초기화 여부 (카운터 도입 전 로그 반영)
+LOG_COUNT_SYNCED_FIELD = "log_count_synced"
 
-# 학습 상태 저장
-def save_train_state(count):
-    state = {
-        "last_count": count,
-        "last_trained_time": datetime.now().isoformat()
-    }
-    with open(STATE_PATH, "w") as f:
-        json.dump(state, f)
+# 카운터 도입 전 로그 수를 count 집계 쿼리로 한 번만 계산해 저장
+# (집계와 저장 사이에 기록된 로그 몇 건은 누락될 수 있음 - 재학습 판단용이므로 허용)
+def backfill_log_count(users_ref, uid):
+    result = users_ref.document(uid).collection("logs").count(alias="count").get()
+    count = int(result[0][0].value)
+    users_ref.document(uid).set({
+        LOG_COUNT_FIELD: count,
+        LOG_COUNT_SYNCED_FIELD: True
+    }, merge=True)
+    return count
 
-# firestore 로그 개수 계산
-def count_total_logs():
-    firestore_db = firestore.client()
-    users_ref = firestore_db.collection("users")
-    users = users_ref.stream()
+# train_dirty 도입 전 사용자는 필드가 없어 dirty 검사 쿼리에 잡히지 않음
+# -> 전체 사용자를 한 번만 확인해 필드가 없는 사용자를 dirty로 표시 (완료하면 marker 파일 기록, 실패하면 다음 검사에서 다시 시도)
+# 반환 : dirty로 표시한 사용자 수
+def backfill_train_dirty(firestore_db, users_ref):
+    if os.path.exists(Config.TRAIN_DIRTY_BACKFILL_MARKER):
+        return 0
 
-    total_count = 0
+    marked = 0
+    batch = firestore_db.batch()
+    for doc in users_ref.select([TRAIN_DIRTY_FIELD]).stream():
+        if TRAIN_DIRTY_FIELD in (doc.to_dict() or {}):
+            continue
+        batch.set(doc.reference, {TRAIN_DIRTY_FIELD: True}, merge=True)
+        marked += 1
+        if marked % 400 == 0:  # batch 최대 500건
+            batch.commit()
+            batch = firestore_db.batch()
+    batch.commit()
 
-    for doc in users:
-        uid = doc.id
-        logs = users_ref.document(uid).collection("logs").stream()
-        count = sum(1 for _ in logs)
-        total_count += count
-    
-    return total_count
+    with open(Config.TRAIN_DIRTY_BACKFILL_MARKER, "w", encoding="utf-8") as f:
+        f.write(datetime.now().isoformat())
+    print(f"train_dirty 도입 전 사용자 {marked}명 학습 대상으로 표시")
+    return marked
 
-# 로그 및 시간 조건 확인 후 재학습
-def check_log_and_train():
-    current_count = count_total_logs()
+# 사용자 로그 수 (users/{uid}.log_count 카운터, 로그 기록 시 log_writer에서 증가)
+def get_log_count(users_ref, uid, data):
+    if data.get(LOG_COUNT_SYNCED_FIELD):
+        return int(data.get(LOG_COUNT_FIELD) or 0)
+    return backfill_log_count(users_ref, uid)
+
+# 재학습 조건 : 마지막 학습 이후 로그 수가 임계치 이상 / 3시간 경과 / 학습 기록 없음 / 특징 매핑 변경
+def needs_training(log_count, data, now):
+    trained_count = int(data.get(TRAINED_LOG_COUNT_FIELD) or 0)
+    last_trained = data.get(LAST_TRAINED_FIELD)
+    if not last_trained or data.get(FEATURE_VERSION_FIELD, 1) != FEATURE_VERSION:
+        return True
+    if log_count - trained_count >= get_threshold(log_count):
+        return True
+    return now - datetime.fromisoformat(last_trained) >= timedelta(hours=3)
 
-    state = load_train_state()
-    last_count = state.get("last_count", 0)
-    last_time_str = state.get("last_trained_time")
-    threshold = get_threshold(current_count)
+# 새 로그가 기록된(dirty) 사용자만 확인 후 학습 큐에 추가
+# 읽기 비용은 전체 사용자가 아니라 최근 사용한 사용자 수에 비례
+# 학습은 별도 프로세스(train_worker.py)에서 실행 (서버 요청 처리와 CPU/메모리를 나눠 쓰지 않도록)
+def check_log_and_train():
+    firestore_db = firestore.client()
+    users_ref = firestore_db.collection("users")
+    try:
+        backfill_train_dirty(firestore_db, users_ref)
+    except Exception as e:
+        print(f"train_dirty 표시 실패 (다음 검사에서 다시 시도): {e}")
+    dirty_users = users_ref.where(TRAIN_DIRTY_FIELD, "==", True).stream()
 
     now = datetime.now()
-    last_time = datetime.fromisoformat(last_time_str) if last_time_str else None
-    time_elapsed = (now - last_time) if last_time else None
+    targets = []
+    checked = 0
+    for doc in dirty_users:
+        checked += 1
+        data = doc.to_dict() or {}
+        log_count = get_log_count(users_ref, doc.id, data)
+        trained_count = int(data.get(TRAINED_LOG_COUNT_FIELD) or 0)
+        if needs_training(log_count, data, now):
+            print(f"{doc.id} - 로그 수: {log_count}, 이전 학습: {trained_count} (+{log_count - trained_count}) → 재학습")
+            targets.append(doc.id)
 
-    # 로그 출력
-    if time_elapsed:
-        print(f"로그 수: {current_count}, 이전 학습: {last_count} (+{current_count - last_count}), 시간 경과: {time_elapsed}")
-    else:
-        print(f"로그 수: {current_count}, 이전 학습: {last_count} (+{current_count - last_count}), 시간 경과: 최초 실행")
+    if not targets:
+        print(f"재학습 조건 미충족 (새 로그가 있는 사용자 {checked}명)")
+        return
 
-    # 조건 검사
-    if (current_count - last_count >= threshold) or (time_elapsed and time_elapsed >= timedelta(hours=3)) or (time_elapsed is None):
-        print("조건 충족 → 모델 재학습 실행")
-        train_model()
-        save_train_state(current_count)
-    else:
-        print("재학습 조건 미충족")
+    added = train_queue.enqueue(targets)
+    print(f"조건 충족 → 학습 큐에 추가 ({added}/{len(targets)}명, 이미 대기 중 {len(targets) - added}명, 확인 {checked}명)")
 
 # 백그라운드 스케줄러 시작
 def start_scheduler():
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify
+from flasgger.utils import swag_from
+from app.services.command_sequencer import command_sequencer
+from app.services.mqtt_service import publisher
+import os
+
+command_bp = Blueprint("command", __name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+# 제스처/음성 명령 전송 상태 조회
+@command_bp.route("/command/<command_id>", methods=["GET"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/command/command_get_status.yml"))
+def get_command_status(command_id):
+    command = command_sequencer.get_status(command_id)
+    if command is None:
+        return jsonify({"error": f"명령 '{command_id}'를 찾을 수 없습니다."}), 404
+
+    return jsonify(command)
+
+# MQTT 전송 지연 시간 및 대기 메시지 수 조회
+@command_bp.route("/mqtt/stats", methods=["GET"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/command/command_get_mqtt_stats.yml"))
+def get_mqtt_stats():
+    return jsonify(publisher.get_stats())
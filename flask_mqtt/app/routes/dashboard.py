@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from firebase_admin import db
 from flasgger.utils import swag_from
+from app.services.mapping_cache import mapping_cache
+from app.services.recommendation_cache import recommendation_cache
 from datetime import datetime
 import os
 
@@ -136,6 +138,8 @@ def register_mapping():
             doc_ref.delete()
             # rtdb에 삭제
             db.reference(f"control_gesture/{uid}/{mode}/{gesture}").delete()
+            mapping_cache.invalidate(uid)
+            recommendation_cache.mark_dirty(uid)
 
             return jsonify({
                 "message": f"모드 '{mode}'에서 control '{control}'가 삭제되었습니다."
@@ -169,6 +173,8 @@ def register_mapping():
         db.reference(f"control_gesture/{uid}/{mode}/{gesture}").set({
             "control": control_sequence if control_sequence else control
         })
+        mapping_cache.invalidate(uid)
+        recommendation_cache.mark_dirty(uid)
 
         return jsonify({
             "message": f"제스처 '{gesture}'가 모드 '{mode}'의 control '{control}'로 등록되었습니다."
@@ -220,6 +226,8 @@ def update_mapping():
     db.reference(f"control_gesture/{uid}/{mode}/{new_gesture}").set({
         "control" : control
     })
+    mapping_cache.invalidate(uid)
+    recommendation_cache.mark_dirty(uid)
 
     return jsonify({
         "message": f"제스처 '{new_gesture}'가 모드 '{mode}'의 control '{control}'로 등록되었습니다."
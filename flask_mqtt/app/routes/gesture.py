@@ -1,88 +1,133 @@
 from flask import Blueprint, request, jsonify, current_app
-from firebase_admin import db
 from app.routes.status import set_gesture_status_log
-from app.services.mqtt_service import publish_metadata
+from app.services.mapping_cache import mapping_cache
+from app.services.command_sequencer import command_sequencer
+from app.services.batch_events import find_duplicates, event_key
+from app.services.device_state import device_state_store, valid_key
+from app.config import Config
 from flasgger.utils import swag_from
 from datetime import datetime
 import os
-import time
 
 gesture_bp = Blueprint("gesture", __name__)
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 
-# 현재 모드에서 제스처 실행
-@gesture_bp.route("/gesture", methods=["POST"])
-@swag_from(os.path.join(BASE_DIR, "docs/swagger/gesture/gesture_post_handle_gesture.yml"))
-def handle_gesture():
-    data = request.get_json()
-    gesture = data.get("gesture")
-    uid = data.get("uid")
-
-    if not gesture or not uid:
-        return jsonify({"error" : "uid와 제스처가 없습니다"}), 400
-
-    firestore_db = current_app.config['FIRESTORE_DB']
-
-    # 인식된 손동작 업데이트
-    db.reference(f"user_info/{uid}").update({
-        "last_gesture": gesture,
-        "updatedAt": datetime.now().isoformat()
-    })
-
-    mode_ref = firestore_db.collection("users").document(uid).collection("mode_gesture").document(gesture).get()
-    selected_mode = mode_ref.to_dict().get("device") if mode_ref.exists else None
-
-    user_info_ref = db.reference(f"user_info/{uid}/current_device")
-    current_device = user_info_ref.get()
+# 제스처 처리 (단건/배치 공통)
+# 반환 : (응답 dict, 상태 코드)
+def process_gesture(app, firestore_db, uid, gesture):
+    # 매핑은 캐시에서 조회
+    selected_mode = mapping_cache.get_mode(firestore_db, uid, gesture)
+    current_device = mapping_cache.get_current_device(uid)
 
     # 모드 설정
     if selected_mode:
         # 모드 선택
         if not current_device or current_device == "null":
-            user_info_ref.set(selected_mode)
-            return jsonify({"message": f"모드 '{selected_mode}'로 설정되었습니다."})
+            mapping_cache.set_current_device(uid, selected_mode)
+            return {"message": f"모드 '{selected_mode}'로 설정되었습니다."}, 200
         # 모드 해제
         elif current_device == selected_mode:
-            user_info_ref.set("null")
-            return jsonify({"message": f"모드 '{selected_mode}'가 해제되었습니다."})
+            mapping_cache.set_current_device(uid, "null")
+            return {"message": f"모드 '{selected_mode}'가 해제되었습니다."}, 200
         # 모드 전환
         else:
-            user_info_ref.set(selected_mode)
-            return jsonify({"message": f"모드 '{current_device}'->'{selected_mode}'로 전환되었습니다."})
+            mapping_cache.set_current_device(uid, selected_mode)
+            return {"message": f"모드 '{current_device}'->'{selected_mode}'로 전환되었습니다."}, 200
 
     if not current_device or current_device == "null":
-        return jsonify({"error": "현재 모드가 설정되어 있지 않습니다."}), 400
+        return {"error": "현재 모드가 설정되어 있지 않습니다."}, 400
 
-    # rtdb에서 매핑 조회
-    mapping = db.reference(f"control_gesture/{uid}/{current_device}/{gesture}").get()
+    # 캐시에서 매핑 조회
+    mapping = mapping_cache.get_mapping(firestore_db, uid, current_device, gesture)
     if mapping is None:
-        return jsonify({"error": f"모드 '{current_device}'에 제스처 '{gesture}'가 없습니다."}), 404
+        return {"error": f"모드 '{current_device}'에 제스처 '{gesture}'가 없습니다."}, 404
 
     control_val = mapping.get("control")
     controls = control_val if isinstance(control_val, list) else [control_val]
 
-    sent = []
-    failed = []
+    # 기기별 큐에 등록 (전송 간격은 스케줄러에서 보장)
+    command_id = command_sequencer.submit(
+        app, uid, current_device, controls,
+        Config.GESTURE_COMMAND_INTERVAL,
+        on_sent=lambda c: set_gesture_status_log(uid, current_device, gesture, c) # 기기 상태 설정 및 로그 기록
+    )
+
+    return {
+        "message": "전송 요청 완료",
+        "command_id": command_id,
+        "controls": controls
+    }, 202
+
+# 인식된 손동작 업데이트 (응답 경로에서 제외, 상태 기록과 함께 rtdb에 모아 반영)
+def update_last_gesture(uid, gesture):
+    device_state_store.write_behind({
+        f"user_info/{uid}/last_gesture": gesture,
+        f"user_info/{uid}/updatedAt": datetime.now().isoformat()
+    })
+
+# 현재 모드에서 제스처 실행
+@gesture_bp.route("/gesture", methods=["POST"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/gesture/gesture_post_handle_gesture.yml"))
+def handle_gesture():
+    data = request.get_json()
+    gesture = data.get("gesture")
+    uid = data.get("uid")
+
+    if not gesture or not uid:
+        return jsonify({"error" : "uid와 제스처가 없습니다"}), 400
+    if not valid_key(uid):
+        return jsonify({"error": "uid 형식이 올바르지 않습니다"}), 400
 
-    for c in controls:
-        metadata = {
-            "mode" : current_device,
-            "control" : c
-        }
-        result = publish_metadata(metadata)
+    firestore_db = current_app.config['FIRESTORE_DB']
 
-        if result.rc != 0:
-            failed.append({"control": c, "error" : f"MQTT 전송 실패 (metadata: {result.rc})"}), 500
-            break
-        else:
-            sent.append(metadata)
-            set_gesture_status_log(uid, current_device, gesture, c) # 기기 상태 설정 및 로그 기록
-            time.sleep(0.3)
-
-    if failed and not sent:
-        return jsonify({"error": "모든 전송 실패", "details": failed}), 500
-    elif failed:
-        return jsonify({"message": "일부 전송 성공", "sent": sent, "failed": failed}), 207
-    else:
-        return jsonify({"message": "전송 성공", "sent": sent})
+    update_last_gesture(uid, gesture)
+
+    result, status_code = process_gesture(current_app._get_current_object(), firestore_db, uid, gesture)
+    return jsonify(result), status_code
+
+# 여러 제스처 이벤트 일괄 실행 (엣지 클라이언트용)
+# 이벤트 순서대로 처리하며, 같은 uid의 같은 제스처가 짧은 간격으로 반복되면 한 번만 실행
+@gesture_bp.route("/gesture/batch", methods=["POST"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/gesture/gesture_post_batch.yml"))
+def handle_gesture_batch():
+    data = request.get_json() or {}
+    events = data.get("events")
+
+    if not isinstance(events, list) or not events:
+        return jsonify({"error": "events 배열이 필요합니다."}), 400
+    if len(events) > Config.BATCH_MAX_EVENTS:
+        return jsonify({"error": f"events는 최대 {Config.BATCH_MAX_EVENTS}개까지 가능합니다."}), 400
+
+    app = current_app._get_current_object()
+    firestore_db = current_app.config['FIRESTORE_DB']
+
+    events = [e if isinstance(e, dict) else {} for e in events]
+    duplicates = find_duplicates(events, lambda e: event_key(e, "uid", "gesture"), Config.BATCH_DEDUPE_WINDOW)
+
+    results = []
+    last_gestures = {}
+    for i, event in enumerate(events):
+        uid = event.get("uid")
+        gesture = event.get("gesture")
+        item = {"index": i, "uid": uid, "gesture": gesture}
+
+        if event_key(event, "uid", "gesture") is None:
+            results.append({**item, "status": 400, "error": "uid와 제스처가 없습니다"})
+            continue
+        if not valid_key(uid):
+            results.append({**item, "status": 400, "error": "uid 형식이 올바르지 않습니다"})
+            continue
+        if duplicates[i] is not None:
+            results.append({**item, "status": 409, "duplicate_of": duplicates[i]})
+            continue
+
+        # 같은 uid의 매핑은 캐시에서 한 번만 조회됨
+        result, status_code = process_gesture(app, firestore_db, uid, gesture)
+        results.append({**item, "status": status_code, **result})
+        last_gestures[uid] = gesture
+
+    for uid, gesture in last_gestures.items():
+        update_last_gesture(uid, gesture)
+
+    return jsonify({"results": results})
@@ -1,34 +1,53 @@
 import os
-import joblib
-import requests
-from sklearn.preprocessing import OneHotEncoder
 from sklearn.ensemble import RandomForestClassifier
 from flask import Blueprint, request, jsonify, current_app
 from firebase_admin import db, firestore
 from flasgger.utils import swag_from
+from app.config import Config
+from app.services.weather_service import weather_service
+from app.services import location_profile
+from app.services.model_registry import model_registry
+from app.services.compact_model import CompactModel
+from app.services.features import FEATURE_VERSION, context_encoder, temperature_bin
+from app.services.feature_store import feature_store
+from app.services.log_writer import LOG_COUNT_FIELD, TRAIN_DIRTY_FIELD
+from app.services.voice_catalog import voice_catalog
+from app.services.recommendation_cache import recommendation_cache
+from app.services.train_queue import train_queue
+from app.services.mapping_cache import mapping_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from astral import LocationInfo
-from astral.sun import sun
-from timezonefinder import TimezoneFinder
 import pytz
 
 recommand_bp = Blueprint("recommand", __name__)
 
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "bde2733011591df872f6e37f11d51336")
+OPENWEATHER_API_KEY = Config.OPENWEATHER_API_KEY
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-MODEL_DIR = os.path.join(BASE_DIR, "models")
 
 MAX_GESTURE_RECOMMEND = 6
 MAX_VOICE_RECOMMEND = 3
 
+# 추천 계산 시 Firebase/날씨 조회를 동시에 실행할 스레드 풀
+_io_executor = ThreadPoolExecutor(max_workers=Config.RECOMMEND_IO_WORKERS, thread_name_prefix="recommend-io")
+
+# 모드가 바뀌면 추천 다시 계산
+mapping_cache.add_listener(lambda uid, device: recommendation_cache.mark_dirty(uid))
+
+# 특징 매핑이 바뀌어 사용할 수 없는 모델 -> 다음 검사에서 다시 학습
+model_registry.add_listener(lambda uid: firestore.client().collection("users").document(uid).set({TRAIN_DIRTY_FIELD: True}, merge=True))
+
+# city -> (lat, lon, timezone) 프로세스 내 캐시 (같은 도시 사용자끼리 공유)
+_geo_cache = {}
+
 def get_coordinates(city, api_key):
     try:
-        response = requests.get("http://api.openweathermap.org/geo/1.0/direct", params= {
+        response = weather_service.session.get("http://api.openweathermap.org/geo/1.0/direct", params= {
             "q": city,
             "limit": 1,
             "appid": api_key
-        })
+        }, timeout=Config.WEATHER_HTTP_TIMEOUT)
         data = response.json()  
 
         if data:
@@ -37,26 +56,49 @@ def get_coordinates(city, api_key):
             return lat, lon
     except:
         pass
-    return 37.5665, 126.9780
+    return None
 
 def get_timezone(lat, lon):
-    try:
-        tf = TimezoneFinder()
-        tz = tf.timezone_at(lat=lat, lng=lon)
-        return tz or "Asia/Seoul"
-    except:
-        return "Asia/Seoul"
+    return location_profile.timezone_at(lat, lon)
+
+# 도시 좌표/시간대 조회
+# 사용자 문서의 geo 필드에 저장해 두고 city/country가 바뀐 경우에만 다시 geocoding
+def resolve_geo(user_ref, user_data, city, country):
+    geo = user_data.get("geo")
+    if isinstance(geo, dict) and geo.get("city") == city and geo.get("country") == country:
+        return geo["lat"], geo["lon"], geo["timezone"]
+
+    cached = _geo_cache.get((city, country))
+    if cached is None:
+        coords = get_coordinates(city, OPENWEATHER_API_KEY)
+        if coords is None:
+            # geocoding 실패는 저장하지 않음 (다음 요청에서 재시도)
+            return 37.5665, 126.9780, "Asia/Seoul"
+        lat, lon = coords
+        cached = (lat, lon, get_timezone(lat, lon))
+        _geo_cache[(city, country)] = cached
+
+    lat, lon, timezone = cached
+    user_ref.set({
+        "geo": {
+            "city": city,
+            "country": country,
+            "lat": lat,
+            "lon": lon,
+            "timezone": timezone
+        }
+    }, merge=True)
+    return lat, lon, timezone
 
-def get_user_location(uid):
-    firestore_db = current_app.config['FIRESTORE_DB']
-    user_doc = firestore_db.collection("users").document(uid).get()
+def get_user_location(firestore_db, uid):
+    user_ref = firestore_db.collection("users").document(uid)
+    user_doc = user_ref.get()
 
     if user_doc.exists:
         user_data = user_doc.to_dict()
         city = user_data.get("city", "Seoul")
         country = user_data.get("country", "KR")
-        lat, lon = get_coordinates(city, OPENWEATHER_API_KEY)
-        timezone = get_timezone(lat, lon)
+        lat, lon, timezone = resolve_geo(user_ref, user_data, city, country)
 
         return LocationInfo(city, country, timezone, lat, lon)
 
@@ -64,19 +106,6 @@ def get_user_location(uid):
         return LocationInfo("Seoul", "KR", "Asia/Seoul", latitude=37.5665, longitude=126.9780)
 
 
-# 현재 기온 가져오기
-def get_current_temperature(city, api_key):
-    try:
-        response = requests.get("https://api.openweathermap.org/data/2.5/weather", params={
-            "q": city,
-            "appid": api_key,
-            "units": "metric"
-        })
-        data = response.json()
-        return float(data["main"]["temp"])
-    except Exception as e:
-        return 24.0
-
 @recommand_bp.route("/recommend_gesture_voice_auto", methods=["GET"])
 @swag_from(os.path.join(BASE_DIR, "docs/swagger/recommend/get_recommend_gesture_voice_auto.yml"))
 def recommend_gesture_auto():
@@ -85,255 +114,310 @@ def recommend_gesture_auto():
         if not uid:
             return jsonify({"error" : "uid가 필요합니다."}), 400
 
-        # 위치, 시간 정보
-        location = get_user_location(uid)
-        timezone = pytz.timezone(location.timezone)
-        now = datetime.now(timezone)
-        hour = now.hour
-        weekday = now.weekday()
-        temp = get_current_temperature(location.name, OPENWEATHER_API_KEY)
-
-        s = sun(location.observer, date=now.date(), tzinfo=timezone)
-        sunrise = s["sunrise"]
-        sunset = s["sunset"]
-        is_morning = sunrise <= now <= sunrise + timedelta(hours=1)
-        is_evening = sunset - timedelta(minutes=30) <= now <= sunset + timedelta(hours=2)
-
-        # 현재 모드 가져오기
-        current_device = db.reference(f"user_info/{uid}/current_device").get()
-        if not current_device:
-            return jsonify({"error": "현재 device 정보를 찾을 수 없습니다."}), 400
-        
-        # mode_gesture 가져오기
-        firestore_db = current_app.config['FIRESTORE_DB']
-        uid_ref = firestore_db.collection("users").document(uid)
-        mode_mappings = uid_ref.collection("mode_gesture").stream()
-        
-        mode_gestures = {}
-        for doc in mode_mappings:
-            data = doc.to_dict()
-            mode = data.get("device")
-            if mode:
-                mode_gestures[mode] = doc.id # device : gesture
-        
-        control_mappings = uid_ref.collection("control_gesture").stream()
-
-        # power_gesture 가져오기
-        power_gestures = {}
-        for doc in control_mappings:
-            data = doc.to_dict()
-            device = data.get("device")
-            control = data.get("control")
-            gesture = data.get("gesture")
-            if device and gesture and control == "power":
-                power_gestures[device] = gesture # device : gesture                
-
-        # 상태 가져오기
-        status_refs = {
-            mode: db.reference(f"status/{uid}/{mode}").get() or {} for mode in mode_gestures
-        }
-
-        gesture_recommendations = []
-        gesture_seen_pairs = set()
-
-        voice_recommendations = []
-        voice_seen_pairs = set()
-
-        def add_gesture_recommendation(device, gesture, reason):
-            pair = (device, gesture)
-            if pair not in gesture_seen_pairs and len(gesture_recommendations) < MAX_GESTURE_RECOMMEND:
-                gesture_seen_pairs.add(pair)
-                gesture_recommendations.append({
-                    "device": device,
-                    "recommended_gesture": gesture,
-                    "reason": reason
-                })
-
-        def add_gesture_sequence(target_device, gesture, reason):
-            if current_device != target_device:
-                mode_gesture = mode_gestures.get(target_device)
-                if mode_gesture and (target_device, mode_gesture) not in gesture_seen_pairs:
-                    add_gesture_recommendation(target_device, mode_gesture, f"{target_device} 모드 진입을 추천해요!")
-            add_gesture_recommendation(target_device, gesture, reason)
-
-        def add_voice_recommendation(device, voice, reason):
-            doc = firestore_db.collection("voice_list").document(voice).get()
-            description = doc.to_dict().get("description") if doc.exists else voice
-
-            pair = (device, voice)
-            if pair not in voice_seen_pairs and len(voice_recommendations) < MAX_VOICE_RECOMMEND:
-                voice_seen_pairs.add(pair)
-                voice_recommendations.append({
-                    "device": device,
-                    "recommended_voice": description,
-                    "reason": reason
-                })
-
-        def add_voice_sequence(target_device, pred_voice, reason):
-            if (target_device, pred_voice) in voice_seen_pairs:
-                return
-
-            pred_device = pred_voice.split("_")[0]
-            if pred_device == target_device:
-                add_voice_recommendation(target_device, pred_voice, reason)
-
-        # 규칙 기반 추천
-        rule_conditions = [
-            ("fan", temp > 27, "현재 온도가 높음 (>27°C) 및 전원이 꺼짐"), 
-            ("curtain", is_morning, "아침 시간대 커튼 열기"), 
-            ("light", is_evening, "저녁 시간대 전등 켜기")
-        ]
-
-        for device, condition, reason in rule_conditions:
-            if condition and status_refs.get(device, {}).get("power") != "on":
-                power_gesture = power_gestures.get(device)
-                if power_gesture:
-                    add_gesture_sequence(device, power_gesture, reason)
-                    add_voice_sequence(device, f"{device}_on", reason)
-
-        # 모델 로드
-        user_model_dir = os.path.join(MODEL_DIR, uid)
-        gesture_model, gesture_encoder = None, None
-        voice_model, voice_encoder = None, None
-
-        gesture_model_path = os.path.join(user_model_dir, "gesture_model.pkl")
-        gesture_encoder_path = os.path.join(user_model_dir, "gesture_encoder.pkl")
-        if os.path.exists(gesture_model_path) and os.path.exists(gesture_encoder_path):
-            gesture_model = joblib.load(gesture_model_path)
-            gesture_encoder = joblib.load(gesture_encoder_path)
-
-        voice_model_path = os.path.join(user_model_dir, "voice_model.pkl")
-        voice_encoder_path = os.path.join(user_model_dir, "voice_encoder.pkl")
-        if os.path.exists(voice_model_path) and os.path.exists(voice_encoder_path):
-            voice_model = joblib.load(voice_model_path)
-            voice_encoder = joblib.load(voice_encoder_path)
-
-        # 로그 기반 추천
-        for device in mode_gestures:
-            status = status_refs[device]
-            log = status.get("log", {})
-            power = status.get("power", "unknown")
-            fan_mode = log.get("fan_mode", "unknown")
-            wind_power = log.get("wind_power", "unknown")
-            color = log.get("color", "unknown")
-
-            X_input = [hour, weekday, temp, device, power, fan_mode, wind_power, color]
-
-            if gesture_model:
-                X_gesture = gesture_encoder.transform([X_input]).toarray()
-                pred_gesture = gesture_model.predict(X_gesture)[0]
-                add_gesture_sequence(device, pred_gesture, "당신의 생활패턴에 딱 맞는 제스처 추천입니다.")
-
-            if voice_model:
-                X_voice = voice_encoder.transform([X_input]).toarray()
-                pred_voice = voice_model.predict(X_voice)[0]
-                add_voice_sequence(device, pred_voice, "당신의 생활패턴에 딱 맞는 음성 추천입니다.")
-
-        if not (gesture_recommendations or voice_recommendations):
-            return jsonify({"message": "추천할 제스처와 음성이 없습니다."})
-
-        return jsonify({
-            "timestamp": now.isoformat(),
-            "recommendations": gesture_recommendations + voice_recommendations
-        })
+        # 미리 계산된 결과 조회 (처음 조회하는 사용자만 여기서 계산)
+        result, status_code = recommendation_cache.get(uid)
+        return jsonify(result), status_code
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-def extract_features(log_entry):
+@recommand_bp.route("/train/stats", methods=["GET"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/recommend/get_train_stats.yml"))
+def get_train_stats():
+    return jsonify({"queue": train_queue.get_stats(), "models": model_registry.get_stats()})
+
+
+# 추천에 쓰는 시간 정보 (현재 시각, 기온, 아침/저녁 여부)
+def time_context(location):
+    timezone = pytz.timezone(location.timezone)
+    now = datetime.now(timezone)
+    temp = weather_service.get_temperature(location.name)
+
+    sunrise, sunset = location_profile.sun_times(location.latitude, location.longitude, location.timezone, now.date())
+    return {
+        "location": location,
+        "now": now,
+        "temp": temp,
+        "is_morning": sunrise <= now <= sunrise + timedelta(hours=1),
+        "is_evening": sunset - timedelta(minutes=30) <= now <= sunset + timedelta(hours=2)
+    }
+
+# 시간 구간 key : 시각(시 단위), 일출/일몰 구간, 기온 규칙(>27°C)/모델 기온 구간, 모델 버전이 바뀌면 추천을 다시 계산
+# (기온 원래 값은 조회할 때마다 조금씩 바뀌므로 추천 결과에 영향을 주는 값만 사용)
+def recommendation_bucket(context):
+    uid = context["uid"]
+    context = time_context(context["location"])
+    return (
+        context["now"].strftime("%Y-%m-%d %H"),
+        context["is_morning"],
+        context["is_evening"],
+        context["temp"] > 27,
+        temperature_bin(context["temp"]),
+        model_registry.version(uid, "gesture"),
+        model_registry.version(uid, "voice")
+    )
+
+# mode_gesture : device -> gesture
+def load_mode_gestures(firestore_db, uid):
+    mode_gestures = {}
+    for doc in firestore_db.collection("users").document(uid).collection("mode_gesture").stream():
+        data = doc.to_dict()
+        mode = data.get("device")
+        if mode:
+            mode_gestures[mode] = doc.id
+    return mode_gestures
+
+# 전원(power) 제스처 : device -> gesture
+def load_power_gestures(firestore_db, uid):
+    power_gestures = {}
+    for doc in firestore_db.collection("users").document(uid).collection("control_gesture").stream():
+        data = doc.to_dict()
+        device = data.get("device")
+        control = data.get("control")
+        gesture = data.get("gesture")
+        if device and gesture and control == "power":
+            power_gestures[device] = gesture
+    return power_gestures
+
+# 사용자 추천 계산
+# 반환 : (응답 dict, 상태 코드, 시간 정보)
+def compute_recommendations(uid):
+    firestore_db = current_app.config['FIRESTORE_DB']
+
+    # 서로 독립적인 조회를 동시에 실행 (전체 시간 ≈ 가장 느린 조회 하나)
+    location_future = _io_executor.submit(lambda: time_context(get_user_location(firestore_db, uid)))
+    current_device_future = _io_executor.submit(db.reference(f"user_info/{uid}/current_device").get)
+    mode_gestures_future = _io_executor.submit(load_mode_gestures, firestore_db, uid)
+    power_gestures_future = _io_executor.submit(load_power_gestures, firestore_db, uid)
+    status_future = _io_executor.submit(db.reference(f"status/{uid}").get) # 기기별 상태를 한 번에 조회
+    gesture_model_future = _io_executor.submit(model_registry.get, uid, "gesture")
+    voice_model_future = _io_executor.submit(model_registry.get, uid, "voice")
+
+    # 위치, 시간 정보
+    context = location_future.result()
+    context["uid"] = uid
+    now = context["now"]
+    hour = now.hour
+    weekday = now.weekday()
+    temp = context["temp"]
+    is_morning = context["is_morning"]
+    is_evening = context["is_evening"]
+
+    # 현재 모드
+    current_device = current_device_future.result()
+    if not current_device:
+        return {"error": "현재 device 정보를 찾을 수 없습니다."}, 400, context
+
+    mode_gestures = mode_gestures_future.result() # device : gesture
+    power_gestures = power_gestures_future.result() # device : gesture
+
+    # 상태
+    all_status = status_future.result()
+    if not isinstance(all_status, dict):
+        all_status = {}
+    status_refs = {
+        mode: all_status.get(mode) or {} for mode in mode_gestures
+    }
+
+    gesture_recommendations = []
+    gesture_seen_pairs = set()
+
+    voice_recommendations = []
+    voice_seen_pairs = set()
+
+    def add_gesture_recommendation(device, gesture, reason):
+        pair = (device, gesture)
+        if pair not in gesture_seen_pairs and len(gesture_recommendations) < MAX_GESTURE_RECOMMEND:
+            gesture_seen_pairs.add(pair)
+            gesture_recommendations.append({
+                "device": device,
+                "recommended_gesture": gesture,
+                "reason": reason
+            })
+
+    def add_gesture_sequence(target_device, gesture, reason):
+        if current_device != target_device:
+            mode_gesture = mode_gestures.get(target_device)
+            if mode_gesture and (target_device, mode_gesture) not in gesture_seen_pairs:
+                add_gesture_recommendation(target_device, mode_gesture, f"{target_device} 모드 진입을 추천해요!")
+        add_gesture_recommendation(target_device, gesture, reason)
+
+    def add_voice_recommendation(device, voice, reason):
+        description = voice_catalog.get_description(firestore_db, voice)
+
+        pair = (device, voice)
+        if pair not in voice_seen_pairs and len(voice_recommendations) < MAX_VOICE_RECOMMEND:
+            voice_seen_pairs.add(pair)
+            voice_recommendations.append({
+                "device": device,
+                "recommended_voice": description,
+                "reason": reason
+            })
+
+    def add_voice_sequence(target_device, pred_voice, reason):
+        if (target_device, pred_voice) in voice_seen_pairs:
+            return
+
+        pred_device = pred_voice.split("_")[0]
+        if pred_device == target_device:
+            add_voice_recommendation(target_device, pred_voice, reason)
+
+    # 규칙 기반 추천
+    rule_conditions = [
+        ("fan", temp > 27, "현재 온도가 높음 (>27°C) 및 전원이 꺼짐"), 
+        ("curtain", is_morning, "아침 시간대 커튼 열기"), 
+        ("light", is_evening, "저녁 시간대 전등 켜기")
+    ]
+
+    for device, condition, reason in rule_conditions:
+        if condition and status_refs.get(device, {}).get("power") != "on":
+            power_gesture = power_gestures.get(device)
+            if power_gesture:
+                add_gesture_sequence(device, power_gesture, reason)
+                add_voice_sequence(device, f"{device}_on", reason)
+
+    # 모델 (레지스트리 캐시, 학습으로 파일이 바뀐 경우에만 다시 읽음)
+    gesture_model, gesture_encoder = gesture_model_future.result()
+    voice_model, voice_encoder = voice_model_future.result()
+
+    # 로그 기반 추천
+    # 기기별 입력을 한 행렬로 모아 한 번만 인코딩하고, 제스처/음성 모델이 같은 입력으로 예측
+    devices = list(mode_gestures)
+    X_input = []
+    for device in devices:
+        status = status_refs[device]
+        log = status.get("log", {})
+        power = status.get("power", "unknown")
+        fan_mode = log.get("fan_mode", "unknown")
+        wind_power = log.get("wind_power", "unknown")
+        color = log.get("color", "unknown")
+        X_input.append([hour, weekday, temp, device, power, fan_mode, wind_power, color])
+
+    X_encoded = context_encoder.transform(X_input) if X_input else None
+    pred_gestures = predict_batch(gesture_model, gesture_encoder, X_input, X_encoded)
+    pred_voices = predict_batch(voice_model, voice_encoder, X_input, X_encoded)
+
+    for i, device in enumerate(devices):
+        if pred_gestures is not None:
+            add_gesture_sequence(device, pred_gestures[i], "당신의 생활패턴에 딱 맞는 제스처 추천입니다.")
+
+        if pred_voices is not None:
+            add_voice_sequence(device, pred_voices[i], "당신의 생활패턴에 딱 맞는 음성 추천입니다.")
+
+    if not (gesture_recommendations or voice_recommendations):
+        return {"timestamp": now.isoformat(), "message": "추천할 제스처와 음성이 없습니다."}, 200, context
+
+    return {
+        "timestamp": now.isoformat(),
+        "recommendations": gesture_recommendations + voice_recommendations
+    }, 200, context
+
+
+# 모델 입력 : compact는 열 번호 그대로, rf는 희소 one-hot
+def model_input(model, X_encoded):
+    if isinstance(model, CompactModel):
+        return X_encoded
+    return context_encoder.one_hot(X_encoded)
+
+
+# 여러 행을 한 번에 예측 (모델이 없거나 입력이 없으면 None)
+# X_encoded : context_encoder.transform(rows) (제스처/음성 모델이 함께 사용)
+def predict_batch(model, encoder, rows, X_encoded):
+    if not model or not rows:
+        return None
+    if encoder is context_encoder:
+        X = model_input(model, X_encoded)
+    else:
+        X = encoder.transform(rows)  # 사용자별 OneHotEncoder로 학습한 이전 rf 모델
+    proba = model.predict_proba(X)
+    return [str(label) for label in model.classes_[proba.argmax(axis=1)]]
+
+
+# 설정된 backend로 모델 학습
+# rf      : 희소 one-hot + RandomForest (100 trees)
+# compact : 빈도표 모델 (app/services/compact_model.py)
+# X_encoded : context_encoder.transform_columns(...) 결과 (특징 값 -> 고정 열 번호)
+def fit_model(X_encoded, y, backend=None):
+    backend = backend or model_registry.backend
+    if backend == "compact":
+        return CompactModel.fit(X_encoded, y)
+
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(context_encoder.one_hot(X_encoded), y)
+    return model
+
+
+# 사용자별 학습 상태 (users/{uid} 문서)
+TRAINED_LOG_COUNT_FIELD = "trained_log_count"  # 마지막 학습 시점의 로그 수 (watermark)
+LAST_TRAINED_FIELD = "last_trained_at"
+MODEL_VERSION_FIELD = "model_version"  # models/{uid}/manifest.json의 version
+FEATURE_VERSION_FIELD = "feature_version"  # 마지막 학습 시점의 features.FEATURE_VERSION
+
+# 사용자 1명 학습 + 학습 상태 기록
+# 반환 : "trained" | "skipped" | "failed"
+def train_user(users_ref, uid):
+    user_ref = users_ref.document(uid)
     try:
-        createdAt = log_entry["createdAt"]
-        dt = datetime.fromisoformat(createdAt)
-        hour = dt.hour
-        weekday = dt.weekday()
-        temp = float(log_entry.get("temperature", 24.0))
-        return {
-            "hour": hour,
-            "weekday": weekday,
-            "temperature": temp,
-            "device": log_entry.get("device", "unknown"),
-            "power": log_entry.get("power", "unknown"),
-            "fan_mode": log_entry.get("fan_mode", "unknown"),
-            "wind_power": log_entry.get("wind_power", "unknown"),
-            "color": log_entry.get("color", "unknown"),
-            "gesture": log_entry.get("gesture"), 
-            "voice" : log_entry.get("voice")
+        # 학습 전에 dirty 해제 : 학습 중에 기록된 로그는 다시 dirty로 표시되어 다음 검사에서 반영
+        user_ref.set({TRAIN_DIRTY_FIELD: False}, merge=True)
+        user_data = user_ref.get().to_dict() or {}
+        log_count = int(user_data.get(LOG_COUNT_FIELD) or 0)
+
+        state = {
+            TRAINED_LOG_COUNT_FIELD: log_count,
+            LAST_TRAINED_FIELD: datetime.now().isoformat(),
+            FEATURE_VERSION_FIELD: FEATURE_VERSION
         }
-    except:
+        version = train_user_model(users_ref, uid)
+        if version:
+            state[MODEL_VERSION_FIELD] = version
+        user_ref.set(state, merge=True)
+    except Exception as e:
+        # 실패한 사용자는 다음 검사에서 다시 학습 (표시하지 못하면 worker가 다시 표시)
+        print(f"{uid} - 모델 학습 실패: {e!r}")
+        try:
+            user_ref.set({TRAIN_DIRTY_FIELD: True}, merge=True)
+        except Exception as e:
+            print(f"{uid} - 재학습 표시 실패: {e!r}")
+        return "failed"
+    return "trained" if version else "skipped"
+
+
+# 학습 프로세스 풀에서 실행하는 작업 (app/services/training_executor.py)
+def train_user_job(uid):
+    return train_user(firestore.client().collection("users"), uid)
+
+
+# 사용자 1명의 제스처/음성 모델 학습, 반환 : 저장한 모델 버전 (학습 데이터가 없으면 None)
+def train_user_model(users_ref, uid):
+    # 로컬 특징 캐시에 새 로그만 추가한 뒤 캐시 전체로 학습
+    feature_store.sync(users_ref.document(uid).collection("logs"), uid)
+    columns = feature_store.load(uid)
+
+    gesture_mask = columns["gesture"] != ""
+    voice_mask = columns["voice"] != ""
+
+    if not gesture_mask.any():
+        print(f"{uid} - 학습할 제스처 데이터가 없습니다.")
         return None
 
+    if not voice_mask.any():
+        print(f"{uid} - 학습할 음성 데이터가 없습니다.")
+        return None
+
+    # 로그 전체를 한 번만 인코딩하고 제스처/음성 모델이 행만 나눠 사용
+    X_encoded = context_encoder.transform_columns(columns)
+
+    # gesture model 학습
+    gesture_model = fit_model(X_encoded[gesture_mask], columns["gesture"][gesture_mask])
+    print(f"{uid} - 제스처 모델 학습 완료")
+
+    # voice model 학습
+    voice_model = fit_model(X_encoded[voice_mask], columns["voice"][voice_mask])
+    print(f"{uid} - 음성 모델 학습 완료")
 
-def train_model():
-    firestore_db = firestore.client()
-    users_ref = firestore_db.collection("users")
-    users = users_ref.stream()
-
-    for doc in users:
-        uid = doc.id
-        logs = users_ref.document(uid).collection("logs").stream()
-        
-        gesture_dataset = []
-        voice_dataset = []
-
-        for log_doc in logs:
-            entry = log_doc.to_dict()
-            features = extract_features(entry)
-            if features:
-                if features.get("gesture"):
-                    gesture_dataset.append(features)
-                if features.get("voice"):
-                    voice_dataset.append(features)                    
-
-        if not gesture_dataset:
-            print(f"{uid} - 학습할 제스처 데이터가 없습니다.")
-            continue
-
-        if not voice_dataset:
-            print(f"{uid} - 학습할 음성 데이터가 없습니다.")
-            continue
-
-        user_model_dir = os.path.join(MODEL_DIR, uid)
-        os.makedirs(user_model_dir, exist_ok=True)
-
-        # gesture model 학습
-        if gesture_dataset:
-            X_raw = [{k: v for k, v in d.items() if k != "gesture"} for d in gesture_dataset]
-            y = [d["gesture"] for d in gesture_dataset]
-
-            encoder = OneHotEncoder(handle_unknown="ignore")
-            X_encoded = encoder.fit_transform([
-                [
-                    d["hour"], d["weekday"], d["temperature"], d["device"],
-                    d["power"], d["fan_mode"], d["wind_power"], d["color"]
-                ] for d in X_raw
-            ]).toarray()
-
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            model.fit(X_encoded, y)
-
-            joblib.dump(model, os.path.join(user_model_dir, "gesture_model.pkl"))
-            joblib.dump(encoder, os.path.join(user_model_dir, "gesture_encoder.pkl"))
-
-            print(f"{uid} - 제스처 모델 학습 및 저장 완료")
-
-        # voice model 학습
-        if voice_dataset:
-            X_raw = [{k: v for k, v in d.items() if k != "voice"} for d in voice_dataset]
-            y = [d["voice"] for d in voice_dataset]
-
-            encoder = OneHotEncoder(handle_unknown="ignore")
-            X_encoded = encoder.fit_transform([
-                [
-                    d["hour"], d["weekday"], d["temperature"], d["device"],
-                    d["power"], d["fan_mode"], d["wind_power"], d["color"]
-                ] for d in X_raw
-            ]).toarray()
-
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            model.fit(X_encoded, y)
-
-            joblib.dump(model, os.path.join(user_model_dir, "voice_model.pkl"))
-            joblib.dump(encoder, os.path.join(user_model_dir, "voice_encoder.pkl"))
-
-            print(f"{uid} - 음성 모델 학습 및 저장 완료")
+    # 두 모델을 한 버전으로 저장 (서버 프로세스는 manifest가 바뀌면 새 모델을 읽음)
+    version = model_registry.save(uid, {"gesture": gesture_model, "voice": voice_model})
+    print(f"{uid} - 모델 저장 완료 (v{version})")
+    return version
@@ -0,0 +1,66 @@
+from flask import Blueprint, request, jsonify, current_app
+from flasgger.utils import swag_from
+from app.routes.gesture import update_last_gesture
+from app.routes.status import set_gesture_status_log
+from app.services.mapping_cache import mapping_cache
+from app.services.mqtt_service import METADATA_TOPIC
+from app.config import Config
+import os
+
+routing_bp = Blueprint("routing", __name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+# 엣지(인식기)용 라우팅 스냅샷 조회
+# 인식기가 스냅샷으로 제스처를 직접 해석해 MQTT로 전송하고, 결과는 /routing/report로 보고
+@routing_bp.route("/routing", methods=["GET"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/routing/routing_get_snapshot.yml"))
+def get_routing_snapshot():
+    uid = request.args.get("uid")
+    if not uid:
+        return jsonify({"error" : "uid가 필요합니다."}), 400
+
+    firestore_db = current_app.config['FIRESTORE_DB']
+    snapshot = mapping_cache.snapshot(firestore_db, uid)
+
+    etag = f'"{snapshot["version"]}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        return "", 304, {"ETag": etag}
+
+    response = jsonify({
+        **snapshot,
+        "topic": METADATA_TOPIC,
+        "gesture_interval": Config.GESTURE_COMMAND_INTERVAL
+    })
+    response.headers["ETag"] = etag
+    return response
+
+# 엣지에서 직접 처리한 제스처 결과 보고 (상태/로그 기록)
+# - 모드 변경 : {"uid", "gesture", "current_device"}
+# - 컨트롤 전송 : {"uid", "gesture", "device", "controls": [...]}
+@routing_bp.route("/routing/report", methods=["POST"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/routing/routing_post_report.yml"))
+def report_edge_gesture():
+    data = request.get_json() or {}
+    uid = data.get("uid")
+    gesture = data.get("gesture")
+
+    if not gesture or not uid:
+        return jsonify({"error" : "uid와 제스처가 없습니다"}), 400
+
+    update_last_gesture(uid, gesture)
+
+    if "current_device" in data:
+        mapping_cache.set_current_device(uid, data.get("current_device") or "null")
+        return jsonify({"message": "모드 변경 기록 완료"}), 202
+
+    device = data.get("device")
+    controls = data.get("controls")
+    if not device or not isinstance(controls, list) or not controls:
+        return jsonify({"error": "device와 controls가 필요합니다."}), 400
+
+    # 상태 엔진(메모리)과 로그 기록기(큐)만 거치므로 네트워크 대기 없음
+    for c in controls:
+        set_gesture_status_log(uid, device, gesture, c)
+
+    return jsonify({"message": "상태 및 로그 기록 완료"}), 202
@@ -0,0 +1,83 @@
+from flask import Blueprint, current_app
+from flask_sock import Sock
+from app.routes.gesture import process_gesture, update_last_gesture
+from app.routes.voice import process_voice
+from app.services.stream_hub import stream_hub, StreamConnection
+from app.services.mapping_cache import mapping_cache
+from app.services.voice_catalog import voice_catalog
+from app.services.batch_events import event_key
+import json
+
+stream_bp = Blueprint("stream", __name__)
+sock = Sock()
+
+# 모드 변경 시 연결된 인식기에 알림
+mapping_cache.add_listener(
+    lambda uid, device: stream_hub.broadcast(uid, {"type": "mode", "uid": uid, "current_device": device})
+)
+
+def handle_stream_event(app, firestore_db, event):
+    kind = event.get("type")
+    uid = event.get("uid")
+
+    if kind == "gesture":
+        gesture = event.get("gesture")
+        if event_key(event, "uid", "gesture") is None:
+            return {"error" : "uid와 제스처가 없습니다"}, 400
+        update_last_gesture(uid, gesture)
+        return process_gesture(app, firestore_db, uid, gesture)
+
+    if kind == "voice":
+        voice = event.get("voice")
+        if event_key(event, "uid", "voice") is None:
+            return {"error" : "uid와 voice 명령어가 모두 필요합니다"}, 400
+        return process_voice(app, uid, voice, voice_catalog.get(firestore_db, voice))
+
+    return {"error": f"알 수 없는 이벤트 type '{kind}'"}, 400
+
+# 인식기 <-> 서버 WebSocket 채널
+# 인식기 -> 서버 : {"type": "subscribe" | "gesture" | "voice" | "ping", "id", "uid", ...}
+# 서버 -> 인식기 : {"type": "ack", "id", "status", ...} / {"type": "mode", "uid", "current_device"}
+@sock.route("/ws", bp=stream_bp)
+def stream(ws):
+    app = current_app._get_current_object()
+    firestore_db = current_app.config['FIRESTORE_DB']
+    conn = StreamConnection(ws)
+    subscribed = set()
+
+    try:
+        while True:
+            raw = ws.receive()
+            if raw is None:
+                break
+
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                conn.send({"type": "ack", "status": 400, "error": "JSON 형식이 아닙니다."})
+                continue
+
+            event_id = event.get("id")
+            uid = event.get("uid")
+
+            # 첫 이벤트의 uid로 알림 구독
+            if uid and uid not in subscribed:
+                stream_hub.register(uid, conn)
+                subscribed.add(uid)
+
+            kind = event.get("type")
+            if kind == "ping":
+                conn.send({"type": "pong", "id": event_id})
+                continue
+            if kind == "subscribe":
+                current_device = mapping_cache.get_current_device(uid) if uid else None
+                conn.send({"type": "mode", "id": event_id, "uid": uid, "current_device": current_device})
+                continue
+
+            try:
+                result, status_code = handle_stream_event(app, firestore_db, event)
+            except Exception as e:
+                result, status_code = {"error": str(e)}, 500
+            conn.send({"type": "ack", "id": event_id, "status": status_code, **result})
+    finally:
+        stream_hub.unregister(conn)
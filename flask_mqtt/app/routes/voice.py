@@ -1,14 +1,49 @@
 from flask import Blueprint, request, jsonify, current_app
 from firebase_admin import db
 from app.routes.status import set_voice_status_log
-from app.services.mqtt_service import publish_metadata
+from app.services.command_sequencer import command_sequencer
+from app.services.batch_events import find_duplicates, event_key
+from flasgger.utils import swag_from
+from app.services.voice_catalog import voice_catalog
+from app.config import Config
 import os
-import time
 
 voice_bp = Blueprint("voice", __name__)
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 
+# 음성 명령 처리 (단건/배치 공통)
+# 반환 : (응답 dict, 상태 코드)
+# voice_data : voice_list 문서 내용 (없으면 None)
+def process_voice(app, uid, voice, voice_data):
+    if voice_data is None:
+        return {"error": f"'{voice}'를 찾을 수 없습니다."}, 404
+
+    device, control = voice.split("_")
+    description = voice_data.get("description", f"{device}_{control}")
+
+    if control in ["on", "off", "open", "close"]:
+        control = "power"
+
+    # tv 전원 순차 전송
+    if device == "tv" and control == "power":
+        controls = ["tvPower", "settopPower"]
+    else:
+        controls = [control]
+
+    # 기기별 큐에 등록 (전송 간격은 스케줄러에서 보장)
+    command_id = command_sequencer.submit(
+        app, uid, device, controls,
+        Config.VOICE_COMMAND_INTERVAL,
+        on_sent=lambda c: set_voice_status_log(uid, device, voice, control) # 기기 상태 설정 및 로그 기록
+    )
+
+    return {
+        "message": f"'{description}' 요청 완료",
+        "command_id": command_id,
+        "controls": controls
+    }, 202
+
 @voice_bp.route("/voice", methods=["POST"])
 def handle_voice():
     data = request.get_json()
@@ -20,44 +55,46 @@ def handle_voice():
 
     # 음성 기반으로 기기, 컨트롤 조회
     firestore_db = current_app.config['FIRESTORE_DB']
-    voice_doc = firestore_db.collection("voice_list").document(voice).get()
+    voice_data = voice_catalog.get(firestore_db, voice)
 
-    if not voice_doc.exists:
-        return jsonify({"error": f"'{voice}'를 찾을 수 없습니다."}), 404
+    result, status_code = process_voice(current_app._get_current_object(), uid, voice, voice_data)
+    return jsonify(result), status_code
 
-    device, control = voice.split("_")
-    description = voice_doc.to_dict().get("description", f"{device}_{control}")
+# 여러 음성 이벤트 일괄 실행 (엣지 클라이언트용)
+@voice_bp.route("/voice/batch", methods=["POST"])
+@swag_from(os.path.join(BASE_DIR, "docs/swagger/voice/voice_post_batch.yml"))
+def handle_voice_batch():
+    data = request.get_json() or {}
+    events = data.get("events")
 
-    if control in ["on", "off", "open", "close"]:
-        control = "power"
+    if not isinstance(events, list) or not events:
+        return jsonify({"error": "events 배열이 필요합니다."}), 400
+    if len(events) > Config.BATCH_MAX_EVENTS:
+        return jsonify({"error": f"events는 최대 {Config.BATCH_MAX_EVENTS}개까지 가능합니다."}), 400
 
-    # tv 전원 순차 전송
-    if device == "tv" and control == "power":
-        controls = ["tvPower", "settopPower"]
-    else:
-        controls = [control]
+    app = current_app._get_current_object()
+    firestore_db = current_app.config['FIRESTORE_DB']
 
-    sent = []
-    failed = []
-
-    for c in controls:
-        metadata = {
-            "mode": device,
-            "control": c
-        }
-        result = publish_metadata(metadata)
-
-        if result.rc != 0:
-            failed.append({"control": c, "error" : f"MQTT 전송 실패 (metadata: {result.rc})"}), 500
-            break
-        else:
-            sent.append(metadata)
-            set_voice_status_log(uid, device, voice, control) # 기기 상태 설정 및 로그 기록
-            time.sleep(0.5)
-
-    if failed and not sent:
-        return jsonify({"error": "모든 전송 실패", "details": failed}), 500
-    elif failed:
-        return jsonify({"message": f"'{description}' 일부 전송 성공", "sent": sent, "failed": failed}), 207
-    else:
-        return jsonify({"message": f"'{description}' 수행 완료", "sent": sent})
+    events = [e if isinstance(e, dict) else {} for e in events]
+    duplicates = find_duplicates(events, lambda e: event_key(e, "uid", "voice"), Config.BATCH_DEDUPE_WINDOW)
+
+    voices = voice_catalog.all(firestore_db)
+
+    results = []
+    for i, event in enumerate(events):
+        uid = event.get("uid")
+        voice = event.get("voice")
+        item = {"index": i, "uid": uid, "voice": voice}
+
+        if event_key(event, "uid", "voice") is None:
+            results.append({**item, "status": 400, "error": "uid와 voice 명령어가 모두 필요합니다"})
+            continue
+        if duplicates[i] is not None:
+            results.append({**item, "status": 409, "duplicate_of": duplicates[i]})
+            continue
+
+        # 등록되지 않은 명령은 404
+        result, status_code = process_voice(app, uid, voice, voices.get(voice))
+        results.append({**item, "status": status_code, **result})
+
+    return jsonify({"results": results})
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+# 배치 이벤트 timestamp (epoch 초 또는 ISO 문자열) -> epoch 초
+def parse_timestamp(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+# 이벤트 필드 값 묶음 (uid, gesture 등) : 비어 있지 않은 문자열이 아닌 필드가 있으면 None
+def event_key(event, *fields):
+    values = tuple(event.get(field) for field in fields)
+    if not all(isinstance(value, str) and value for value in values):
+        return None
+    return values
+
+# 같은 키(uid, gesture 등)가 window 초 안에 반복되면 중복으로 표시
+# 반환 : 이벤트별 중복 대상 인덱스 (중복이 아니면 None, 키가 None인 이벤트는 검사하지 않음)
+def find_duplicates(events, key_func, window):
+    last_accepted = {}   # key -> (index, timestamp)
+    duplicates = []
+
+    for i, event in enumerate(events):
+        key = key_func(event)
+        if key is None:
+            duplicates.append(None)
+            continue
+        ts = parse_timestamp(event.get("timestamp"))
+        prev = last_accepted.get(key)
+
+        if prev and ts is not None and prev[1] is not None and 0 <= ts - prev[1] < window:
+            duplicates.append(prev[0])
+        else:
+            duplicates.append(None)
+            last_accepted[key] = (i, ts)
+
+    return duplicates
@@ -0,0 +1,171 @@
+import heapq
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.config import Config
+from app.services.mqtt_service import publish_metadata
+
+# (uid, device)별 명령 큐
+# 요청 스레드에서 sleep 하지 않고, 같은 기기로 가는 컨트롤 사이의 간격은 스케줄러가 보장
+# - 스케줄러 스레드 : 다음 컨트롤을 보낼 수 있는 시각이 된 큐를 골라 실행기에 넘김
+# - 실행기(스레드 풀) : MQTT 전송 및 상태/로그 기록
+# 한 큐에서는 이전 컨트롤이 끝나고 간격이 지나야 다음 컨트롤이 실행되므로 순서가 유지됨
+class CommandSequencer:
+    def __init__(self, max_workers, history_size):
+        self.history_size = history_size
+        self._cond = threading.Condition()
+        self._queues = {}           # (uid, device) -> deque[(command_id, control, interval)]
+        self._ready_at = {}         # (uid, device) -> 다음 전송 가능 시각
+        self._busy = set()          # 실행 중인 큐
+        self._heap = []             # (ready_at, key)
+        self._commands = OrderedDict()
+        self._callbacks = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="command")
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="command-scheduler", daemon=True)
+            self._thread.start()
+
+    # 명령 등록 후 command_id 반환
+    # on_sent(control) : 컨트롤 전송 성공 시 실행기 스레드에서 호출 (app context 안)
+    def submit(self, app, uid, device, controls, interval, on_sent=None):
+        command_id = uuid.uuid4().hex
+        key = (uid, device)
+
+        with self._cond:
+            self._ensure_started()
+            self._commands[command_id] = {
+                "command_id": command_id,
+                "uid": uid,
+                "device": device,
+                "status": "queued",
+                "controls": list(controls),
+                "sent": [],
+                "unconfirmed": [],  # 전송했지만 브로커 전달 확인 전 timeout (나중에 전달될 수 있음)
+                "failed": [],
+                "createdAt": datetime.now().isoformat(),
+                "completedAt": None
+            }
+            while len(self._commands) > self.history_size:
+                old_id, _ = self._commands.popitem(last=False)
+                self._callbacks.pop(old_id, None)
+            self._callbacks[command_id] = (app, on_sent)
+
+            # 간격이 이미 지난 기기의 전송 시각 정리
+            if len(self._ready_at) > self.history_size:
+                now = time.monotonic()
+                for k in [k for k, t in self._ready_at.items() if t <= now and k not in self._queues]:
+                    del self._ready_at[k]
+
+            queue = self._queues.setdefault(key, deque())
+            for c in controls:
+                queue.append((command_id, c, interval))
+
+            if key not in self._busy and len(queue) == len(controls):
+                heapq.heappush(self._heap, (self._ready_at.get(key, 0), key))
+            self._cond.notify()
+
+        return command_id
+
+    def get_status(self, command_id):
+        with self._cond:
+            command = self._commands.get(command_id)
+            if command is None:
+                return None
+            return {
+                **command,
+                "sent": list(command["sent"]),
+                "unconfirmed": list(command["unconfirmed"]),
+                "failed": list(command["failed"])
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        _, key = heapq.heappop(self._heap)
+                        if key in self._busy or not self._queues.get(key):
+                            continue
+                        command_id, control, interval = self._queues[key].popleft()
+                        self._busy.add(key)
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+
+            self._executor.submit(self._execute, key, command_id, control, interval)
+
+    def _execute(self, key, command_id, control, interval):
+        uid, device = key
+        with self._cond:
+            command = self._commands.get(command_id)
+            app, on_sent = self._callbacks.get(command_id, (None, None))
+            if command is not None:
+                command["status"] = "running"
+
+        metadata = {
+            "mode": device,
+            "control": control
+        }
+        unconfirmed = False
+        try:
+            result = publish_metadata(metadata)
+            error = None if result.rc == 0 else f"MQTT 전송 실패 (metadata: {result.rc}, {result.error})"
+            # 전송 대기열에 들어간 메시지는 나중에 전달되므로 상태/로그도 전송한 것으로 기록
+            unconfirmed = error is not None and result.unconfirmed
+        except Exception as e:
+            error = f"MQTT 전송 실패 ({e})"
+
+        if (error is None or unconfirmed) and on_sent:
+            try:
+                with app.app_context():
+                    on_sent(control)
+            except Exception as e:
+                print(f"[command] 상태 기록 실패 ({uid}, {device}, {control}): {e}")
+
+        with self._cond:
+            queue = self._queues.get(key, deque())
+            if command is not None:
+                if error is None:
+                    command["sent"].append(metadata)
+                elif unconfirmed:
+                    command["unconfirmed"].append({"control": control, "error": error})
+                else:
+                    command["failed"].append({"control": control, "error": error})
+                    # 전송 실패 시 같은 명령의 나머지 컨트롤은 취소
+                    remaining = [item for item in queue if item[0] != command_id]
+                    queue.clear()
+                    queue.extend(remaining)
+
+                pending = any(item[0] == command_id for item in queue)
+                if not pending:
+                    command["status"] = self._final_status(command)
+                    command["completedAt"] = datetime.now().isoformat()
+                    self._callbacks.pop(command_id, None)
+
+            self._busy.discard(key)
+            self._ready_at[key] = time.monotonic() + interval
+            if queue:
+                heapq.heappush(self._heap, (self._ready_at[key], key))
+            else:
+                self._queues.pop(key, None)
+            self._cond.notify()
+
+    @staticmethod
+    def _final_status(command):
+        if command["failed"] and not command["sent"] and not command["unconfirmed"]:
+            return "failed"
+        elif command["failed"]:
+            return "partial"
+        elif command["unconfirmed"]:
+            return "unconfirmed"
+        return "done"
+
+
+command_sequencer = CommandSequencer(Config.COMMAND_WORKERS, Config.COMMAND_HISTORY_SIZE)
@@ -0,0 +1,63 @@
+import numpy as np
+from app.services.features import FEATURE_VERSION, context_encoder
+
+# 빈도표 기반 추천 모델 (categorical naive bayes)
+# - 클래스(제스처/음성)별로 특징 값 등장 횟수만 저장 : (클래스 수, 전체 열 수) 정수 배열
+# - 입력은 features.ContextEncoder의 정수 열 번호 (OneHotEncoder 불필요)
+# - npz로 저장 (pickle 없음)
+#
+# 크기/지연 예산 (클래스 20개 이하, benchmarks/bench_models.py 기준)
+# - 파일 : 10KB 이하 (rf : 로그 300건 기준 약 4MB)
+# - 로드 : 2ms 이하 (rf : 약 40ms)
+# - 예측 : 기기 4개 한 번에 0.5ms 이하 (rf : 약 13ms)
+#
+# 정확도는 rf보다 낮음 (같은 벤치마크, 최대 약 0.825)
+# - 로그 100 / 300 / 1000건 : compact 0.33 / 0.47 / 0.67, rf 0.44 / 0.64 / 0.78
+# - 크기/지연이 중요한 경우(기기 메모리, 사용자 수가 많은 서버)에만 사용, 기본 backend는 rf
+class CompactModel:
+    def __init__(self, classes, counts, class_counts, alpha=1.0):
+        self.classes_ = np.asarray(classes)
+        self.counts = np.asarray(counts, dtype=np.int32)
+        self.class_counts = np.asarray(class_counts, dtype=np.int32)
+        self.alpha = alpha
+
+        # 로그 확률표 미리 계산 (라플라스 평활)
+        sizes = np.repeat(context_encoder.sizes, context_encoder.sizes)
+        self._log_prior = np.log(self.class_counts + alpha) - np.log(self.class_counts.sum() + alpha * len(self.class_counts))
+        self._log_likelihood = np.log(self.counts + alpha) - np.log(self.class_counts[:, None] + alpha * sizes[None, :])
+
+    @classmethod
+    def fit(cls, X, y, alpha=1.0):
+        classes, y_index = np.unique(np.asarray(y), return_inverse=True)
+        counts = np.zeros((len(classes), context_encoder.n_columns), dtype=np.int32)
+        for j in range(X.shape[1]):
+            np.add.at(counts, (y_index, X[:, j]), 1)
+        class_counts = np.bincount(y_index, minlength=len(classes)).astype(np.int32)
+        return cls(classes, counts, class_counts, alpha)
+
+    def predict_proba(self, X):
+        scores = self._log_prior[None, :] + self._log_likelihood[:, X].sum(axis=2).T
+        scores -= scores.max(axis=1, keepdims=True)
+        proba = np.exp(scores)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    # f : 경로 또는 파일 객체
+    def save(self, f):
+        np.savez(
+            f,
+            feature_version=FEATURE_VERSION,
+            classes=self.classes_.astype(str),
+            counts=self.counts,
+            class_counts=self.class_counts,
+            alpha=self.alpha
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["feature_version"]) != FEATURE_VERSION or data["counts"].shape[1] != context_encoder.n_columns:
+                raise ValueError(f"특징 매핑 버전이 다른 모델입니다: {path}")
+            return cls(data["classes"], data["counts"], data["class_counts"], float(data["alpha"]))
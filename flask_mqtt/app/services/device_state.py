@@ -0,0 +1,301 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from firebase_admin import db, exceptions
+from app.config import Config
+
+# rtdb key에 쓸 수 없는 문자 ('/'는 경로 구분자)
+INVALID_KEY_CHARS = set(".$#[]/")
+
+# 다시 시도하면 성공할 수 있는 rtdb 오류 (연결/서버 오류), 그 외(잘못된 경로/값, 권한)는 다시 보내도 실패
+TRANSIENT_ERRORS = (
+    exceptions.UnavailableError,
+    exceptions.DeadlineExceededError,
+    exceptions.InternalError,
+    exceptions.ResourceExhaustedError,
+    exceptions.UnknownError
+)
+
+# rtdb key로 쓸 수 있는 값인지 (빈 문자열, 금지 문자, 제어 문자 불가)
+def valid_key(value):
+    return (
+        isinstance(value, str) and value != ""
+        and not any(ch in INVALID_KEY_CHARS or ord(ch) < 32 or ord(ch) == 127 for ch in value)
+    )
+
+# 기기 상태 전이 (rtdb status/{uid}/{device} 노드 기준)
+
+def infer_device_status(device, control, current_power, current_log):
+    cyclic_logs = {
+        "light": {
+            "color": ["전구색(Warm)", "주광색(Cool)", "주백색(Natural)"]
+        },
+        "fan": {
+            "mode": ["normal", "natural", "sleep", "eco"]
+        }
+    }
+
+    # power 설정
+    if control == "power":
+        power = "off" if current_power == "on" else "on"
+        log = {"power": power}
+        if device == "fan" and power == "off":
+            log["timer"] = "0"
+        return power, log
+    
+    # cyclic log 설정
+    cyclic = cyclic_logs.get(device, {}).get(control)
+    if cyclic:
+        prev = current_log.get(control)
+        if prev in cyclic:
+            idx = (cyclic.index(prev) + 1) % len(cyclic)
+        else:
+            idx = 0
+        current_log[control] = cyclic[idx]
+
+    current_log["last_control"] = control
+
+    return current_power, current_log
+
+def update_light_log(control, log, current_log):
+    if control != "color":
+        color = current_log.get("color")
+        if color:
+            log["color"] = color
+
+    return log
+
+def update_fan_log(control, log, current_log):
+    fan_mode = current_log.get("mode")
+    wind_power = current_log.get("wind_power", "1")
+    timer = current_log.get("timer", "0")
+
+    if wind_power:
+        log["wind_power"] = wind_power
+    if timer:
+        log["timer"] = timer
+
+    if control == "mode":
+        if log.get("mode") == "eco" and wind_power:
+            log["wind_power"] = "2"
+        else:
+            pass
+    elif control in ["stronger", "weaker"]:
+        if fan_mode == "eco":
+            log["wind_power"] = "2"
+        elif wind_power:
+            wp = int(wind_power)
+            wp = wp + 1 if control == "stronger" and wp < 12 else wp
+            wp = wp - 1 if control == "weaker" and wp > 1 else wp
+            log["wind_power"] = str(wp)
+
+        if fan_mode:
+            log["mode"] = fan_mode
+    elif control == "timer":
+        if timer:
+            t = float(timer)
+            t = t + 0.5 if t < 7.5 else 0.0
+        log["timer"] = str(t)
+
+        if fan_mode:
+            log["mode"] = fan_mode
+    else:      
+        if fan_mode:
+            log["mode"] = fan_mode
+        if log.get("power") == "off":
+            log["timer"] = "0.0"
+    
+    return log
+
+def apply_transition(device, control, node):
+    current_power = node.get("power") or "off"
+    log_data = node.get("log")
+    stored_log = log_data if isinstance(log_data, dict) else {}
+
+    # infer_device_status는 전달받은 log를 수정하므로 복사본 사용
+    power, log = infer_device_status(device, control, current_power, dict(stored_log))
+
+    # log 고정 변수 설정
+    if device == "light":
+        log = update_light_log(control, log, stored_log)
+    elif device == "fan":
+        log = update_fan_log(control, log, stored_log)
+
+    return power, log
+
+# (uid, device)별 현재 상태를 메모리에 보관하는 상태 엔진
+# - 메모리 상태가 기준이며 전이는 rtdb 조회 없이 바로 계산
+# - 첫 접근 시 rtdb에서 상태를 불러오고, ttl이 지나면 다시 불러옴
+#   (앱/rtdb에서 직접 바꾼 상태, 다른 서버 프로세스가 바꾼 상태를 반영)
+# - rtdb 반영은 백그라운드에서 주기적으로, 기기별 마지막 상태만 모아 update() 한 번으로 기록
+# - 아직 rtdb에 반영되지 않았거나 반영 중인 상태는 제거/다시 불러오기 대상에서 제외
+class DeviceStateStore:
+    def __init__(self, mirror_interval, max_devices, ttl):
+        self.mirror_interval = mirror_interval
+        self.max_devices = max_devices
+        self.ttl = ttl
+        self._states = OrderedDict()   # (uid, device) -> {"power", "log", "loaded_at"}
+        self._dirty = {}               # (uid, device) -> rtdb에 반영할 상태
+        self._inflight = set()         # rtdb에 반영 중인 (uid, device)
+        self._extra = {}               # rtdb 경로 -> 값 (상태 외 write-behind 기록)
+        self._lock = threading.Lock()
+        self._mirror_thread = None
+
+    def _ensure_mirror(self):
+        if self._mirror_thread is None:
+            self._mirror_thread = threading.Thread(target=self._mirror_loop, name="state-mirror", daemon=True)
+            self._mirror_thread.start()
+            atexit.register(self.flush)
+
+    def _load(self, uid, device):
+        node = db.reference(f"status/{uid}/{device}").get()
+        node = node if isinstance(node, dict) else {}
+        log = node.get("log")
+        return {
+            "power": node.get("power"),
+            "log": log if isinstance(log, dict) else {},
+            "loaded_at": time.monotonic()
+        }
+
+    # rtdb에 반영 중이거나 반영할 상태 (메모리 값이 rtdb보다 최신)
+    def _pending(self, key):
+        return key in self._dirty or key in self._inflight
+
+    # 다시 불러오지 않고 메모리 상태를 그대로 쓸 수 있는지
+    def _fresh(self, key, state):
+        return state is not None and (self._pending(key) or time.monotonic() - state["loaded_at"] < self.ttl)
+
+    def _get(self, uid, device):
+        key = (uid, device)
+        with self._lock:
+            state = self._states.get(key)
+            if self._fresh(key, state):
+                self._states.move_to_end(key)
+                return state
+
+        # 상태 복원 (lock 밖에서 조회)
+        loaded = self._load(uid, device)
+
+        with self._lock:
+            state = self._states.get(key)
+            # 조회하는 사이 메모리 상태가 바뀌었으면 메모리 값 유지
+            if not self._fresh(key, state):
+                state = self._states[key] = loaded
+            self._states.move_to_end(key)
+            self._evict()
+            return state
+
+    # 오래 사용하지 않은 상태부터 제거 (rtdb에 반영되지 않았거나 반영 중인 상태는 유지)
+    def _evict(self):
+        excess = len(self._states) - self.max_devices
+        if excess <= 0:
+            return
+        for key in list(self._states):
+            if excess <= 0:
+                break
+            if not self._pending(key):
+                del self._states[key]
+                excess -= 1
+
+    def get(self, uid, device):
+        state = self._get(uid, device)
+        with self._lock:
+            return {"power": state["power"], "log": dict(state["log"])}
+
+    def apply(self, uid, device, control):
+        state = self._get(uid, device)
+        key = (uid, device)
+
+        with self._lock:
+            # 조회 후 다른 요청이 다시 불러왔거나 제거된 경우에도 메모리에 있는 상태 하나를 기준으로 전이
+            state = self._states.setdefault(key, state)
+            power, log = apply_transition(device, control, state)
+            state["power"] = power
+            state["log"] = log
+            self._dirty[key] = {"power": power, "log": dict(log)}
+            self._ensure_mirror()
+
+        return power, dict(log)
+
+    # rtdb 값이 외부에서 바뀐 경우 다음 접근 시 다시 불러오도록 제거
+    def invalidate(self, uid, device=None):
+        with self._lock:
+            for key in [k for k in self._states if k[0] == uid and (device is None or k[1] == device)]:
+                if not self._pending(key):
+                    del self._states[key]
+
+    # 상태 외 rtdb 기록 (예: 마지막 제스처)도 같은 주기의 update()에 모아 반영, 같은 경로는 마지막 값만
+    # 경로에 쓸 수 없는 key가 있으면 기록하지 않음 (update() 전체가 실패하므로)
+    def write_behind(self, updates):
+        invalid = [path for path in updates if not all(valid_key(key) for key in path.split("/"))]
+        if invalid:
+            print(f"[state] 잘못된 rtdb 경로 제외: {invalid}")
+            updates = {path: value for path, value in updates.items() if path not in invalid}
+        if not updates:
+            return
+        with self._lock:
+            self._extra.update(updates)
+            self._ensure_mirror()
+
+    def _mirror_loop(self):
+        while True:
+            time.sleep(self.mirror_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty and not self._extra:
+                return
+            pending, self._dirty = self._dirty, {}
+            extra, self._extra = self._extra, {}
+            self._inflight.update(pending)
+
+        try:
+            self._write(pending, extra)
+        except TRANSIENT_ERRORS as e:
+            print(f"[state] rtdb 반영 실패 ({len(pending)}개 기기), 다음 주기에 재시도: {e}")
+            self._requeue(pending, extra)
+        except Exception as e:
+            # 잘못된 경로/값 등 : 사용자별로 나눠 다시 보내고 실패한 사용자의 기록만 버림
+            print(f"[state] rtdb 반영 실패, 사용자별로 다시 시도: {e}")
+            self._flush_per_user(pending, extra)
+
+        with self._lock:
+            self._inflight.difference_update(pending)
+
+    # pending : (uid, device) -> 상태, extra : rtdb 경로 -> 값
+    def _write(self, pending, extra):
+        updates = dict(extra)
+        for (uid, device), state in pending.items():
+            updates[f"status/{uid}/{device}/power"] = state["power"]
+            updates[f"status/{uid}/{device}/log"] = state["log"]
+        db.reference("/").update(updates)
+
+    # 실패한 기록을 다음 주기에 다시 반영 (그 사이 새로 바뀐 값이 있으면 그 값을 우선)
+    def _requeue(self, pending, extra):
+        with self._lock:
+            for key, state in pending.items():
+                self._dirty.setdefault(key, state)
+            for path, value in extra.items():
+                self._extra.setdefault(path, value)
+
+    def _flush_per_user(self, pending, extra):
+        groups = {}
+        for key, state in pending.items():
+            groups.setdefault(key[0], ({}, {}))[0][key] = state
+        for path, value in extra.items():
+            # user_info/{uid}/... 등 두 번째 key가 uid
+            parts = path.split("/")
+            groups.setdefault(parts[1] if len(parts) > 1 else path, ({}, {}))[1][path] = value
+
+        for uid, (user_pending, user_extra) in groups.items():
+            try:
+                self._write(user_pending, user_extra)
+            except TRANSIENT_ERRORS as e:
+                print(f"[state] {uid} rtdb 반영 실패, 다음 주기에 재시도: {e}")
+                self._requeue(user_pending, user_extra)
+            except Exception as e:
+                print(f"[state] {uid} rtdb 반영 실패, 기록 버림 ({len(user_pending)}개 기기, 경로 {len(user_extra)}개): {e}")
+
+device_state_store = DeviceStateStore(Config.STATE_MIRROR_INTERVAL, Config.STATE_MAX_DEVICES, Config.STATE_TTL)
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+import numpy as np
+from app.config import Config
+from app.services.features import extract_features
+from app.services.log_writer import WRITTEN_AT_FIELD
+from app.services.model_registry import atomic_write
+
+STORE_VERSION = 1
+
+# writtenAt이 있는 로그를 하나도 읽지 않은 전체 동기화 후의 watermark
+# (읽은 로그에 writtenAt이 없으면 writtenAt이 있는 로그는 모두 아직 가져오지 않은 로그)
+EPOCH_WATERMARK = datetime(1970, 1, 1, tzinfo=timezone.utc).isoformat()
+
+# 저장 열 (특징 + 라벨), 라벨이 없으면 ""
+COLUMN_DTYPES = {
+    "hour": np.int8,
+    "weekday": np.int8,
+    "temperature": np.float64,
+    "device": str,
+    "power": str,
+    "fan_mode": str,
+    "wind_power": str,
+    "color": str,
+    "gesture": str,
+    "voice": str
+}
+
+# 사용자별 학습 데이터(특징) 로컬 캐시
+# - feature_cache/{uid}/shard-*.npz : 열 단위 배열, 동기화할 때마다 새 로그만 shard 하나로 추가
+# - feature_cache/{uid}/meta.json   : shard 목록, 마지막으로 가져온 로그의 writtenAt(watermark)
+# - 다음 동기화는 writtenAt > watermark 인 로그만 firestore에서 조회
+# - watermark가 없으면(처음) 전체를 가져와 캐시를 새로 만듦
+#   writtenAt 도입 전 로그만 있으면 EPOCH_WATERMARK를 저장 (다음 동기화부터는 새 로그만 조회)
+class FeatureStore:
+    def __init__(self, root_dir, max_shards):
+        self.root_dir = root_dir
+        self.max_shards = max_shards
+
+    def _dir(self, uid):
+        return os.path.join(self.root_dir, uid)
+
+    def _read_meta(self, uid):
+        try:
+            with open(os.path.join(self._dir(uid), "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta if meta.get("version") == STORE_VERSION else None
+
+    def _write_meta(self, uid, meta):
+        data = json.dumps({**meta, "version": STORE_VERSION}, ensure_ascii=False).encode("utf-8")
+        atomic_write(os.path.join(self._dir(uid), "meta.json"), lambda f: f.write(data))
+
+    def _write_shard(self, uid, columns):
+        name = f"shard-{time.time_ns()}.npz"
+        atomic_write(os.path.join(self._dir(uid), name), lambda f: np.savez_compressed(f, **columns))
+        return name
+
+    # 새 로그를 가져와 캐시에 추가, 추가한 로그 수 반환
+    def sync(self, logs_ref, uid):
+        meta = self._read_meta(uid)
+        watermark = meta.get("watermark") if meta else None
+
+        if watermark:
+            query = logs_ref.where(WRITTEN_AT_FIELD, ">", datetime.fromisoformat(watermark)).order_by(WRITTEN_AT_FIELD)
+            shards = meta["shards"]
+        else:
+            query = logs_ref
+            shards = []
+
+        rows = []
+        latest = None
+        for doc in query.stream():
+            entry = doc.to_dict()
+            written_at = entry.get(WRITTEN_AT_FIELD)
+            if isinstance(written_at, datetime) and (latest is None or written_at > latest):
+                latest = written_at
+            features = extract_features(entry)
+            if features:
+                rows.append(features)
+
+        if watermark and latest is None:
+            return 0 # 새 로그 없음
+
+        os.makedirs(self._dir(uid), exist_ok=True)
+        old_shards = [] if watermark else (meta or {}).get("shards", [])
+        if rows:
+            shards = shards + [self._write_shard(uid, self._to_columns(rows))]
+
+        self._write_meta(uid, {
+            "watermark": (latest.isoformat() if latest else watermark or EPOCH_WATERMARK),
+            "shards": shards,
+            "rows": (meta.get("rows", 0) if watermark else 0) + len(rows)
+        })
+        self._remove_shards(uid, old_shards)
+
+        if len(shards) > self.max_shards:
+            self._compact(uid)
+        return len(rows)
+
+    def _to_columns(self, rows):
+        columns = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            values = [row.get(name) for row in rows]
+            if dtype is str:
+                columns[name] = np.array(["" if v is None else str(v) for v in values])
+            else:
+                columns[name] = np.array(values, dtype=dtype)
+        return columns
+
+    def _remove_shards(self, uid, shards):
+        for name in shards:
+            try:
+                os.remove(os.path.join(self._dir(uid), name))
+            except FileNotFoundError:
+                pass
+
+    # shard를 하나로 합침
+    def _compact(self, uid):
+        meta = self._read_meta(uid)
+        columns = self.load(uid)
+        name = self._write_shard(uid, columns)
+        self._write_meta(uid, {**meta, "shards": [name]})
+        self._remove_shards(uid, meta["shards"])
+
+    # 캐시 전체를 열 단위 배열 dict로 반환 (특징 8개 + gesture, voice)
+    def load(self, uid):
+        meta = self._read_meta(uid)
+        parts = {name: [] for name in COLUMN_DTYPES}
+        for name in (meta or {}).get("shards", []):
+            with np.load(os.path.join(self._dir(uid), name), allow_pickle=False) as data:
+                for column in COLUMN_DTYPES:
+                    parts[column].append(data[column])
+        return {
+            name: np.concatenate(arrays) if arrays else np.array([], dtype=COLUMN_DTYPES[name])
+            for name, arrays in parts.items()
+        }
+
+    def clear(self, uid):
+        shutil.rmtree(self._dir(uid), ignore_errors=True)
+
+
+feature_store = FeatureStore(Config.FEATURE_CACHE_DIR, Config.FEATURE_CACHE_MAX_SHARDS)
@@ -0,0 +1,161 @@
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+
+# 추천 모델 입력 특징의 고정 정수 매핑
+# 학습 데이터에 따라 바뀌는 OneHotEncoder 대신 값 목록을 코드에 고정해 두고,
+# 각 특징 값을 전체 열 번호(0 ~ n_columns-1)로 변환
+# 목록에 없는 값은 특징별 0번(기타) 열로 변환
+# 값 목록이 고정이므로 사용자/모델과 무관하게 인코더 하나(context_encoder)를 공유하고,
+# 한 번 변환한 입력을 제스처/음성 모델이 함께 사용
+# 값 목록을 바꾸면 FEATURE_VERSION을 올릴 것 (저장된 모델과 열 번호가 맞지 않음)
+FEATURE_VERSION = 2
+
+# 입력 행 순서
+FEATURES = ["hour", "weekday", "temperature", "device", "power", "fan_mode", "wind_power", "color"]
+CATEGORICAL = ["device", "power", "fan_mode", "wind_power", "color"]
+
+# 기온 구간 경계 (°C) : 0 미만, 0~3, 3~6, ..., 36 이상
+TEMPERATURE_BINS = list(range(0, 37, 3))
+
+# 기온 -> 구간 번호 (모델 입력의 temperature 값, 0번은 기온 없음)
+def temperature_bin(temp):
+    return int(np.digitize(temp, TEMPERATURE_BINS)) + 1
+
+# 앱(mobile_dashboard)에서 제어하는 기기 전체
+DEVICES = ["light", "fan", "curtain", "ac", "tv", "projector"]
+POWERS = ["on", "off"]
+DAYPARTS = list(range(6))  # 4시간 단위
+
+VOCABULARY = {
+    "hour": list(range(24)),
+    "weekday": list(range(7)),
+    "temperature": list(range(len(TEMPERATURE_BINS) + 1)),
+    "device": DEVICES,
+    "power": POWERS,
+    "fan_mode": ["normal", "natural", "sleep", "eco"],
+    "wind_power": [str(i) for i in range(1, 13)],
+    "color": ["전구색(Warm)", "주광색(Cool)", "주백색(Natural)"],
+    # 조합 특징 : (기기, 전원, 시간대) - 같은 상황에서 쓰던 명령을 직접 반영
+    # compact(naive bayes)는 특징을 서로 독립으로 보므로 기기 x 전원 x 시간대 조합을 따로 학습하지 못함
+    # (이 열이 없으면 benchmarks/bench_models.py 정확도 0.21~0.24, rf는 트리 분기로 조합을 학습하므로 영향이 작음)
+    "situation": [(d, p, h) for d in DEVICES for p in POWERS for h in DAYPARTS]
+}
+
+COLUMNS = FEATURES + ["situation"]
+
+
+# 로그 1건 -> 특징 dict (createdAt이 없거나 잘못된 경우 None)
+def extract_features(log_entry):
+    try:
+        createdAt = log_entry["createdAt"]
+        dt = datetime.fromisoformat(createdAt)
+        hour = dt.hour
+        weekday = dt.weekday()
+        temp = float(log_entry.get("temperature", 24.0))
+        return {
+            "hour": hour,
+            "weekday": weekday,
+            "temperature": temp,
+            "device": log_entry.get("device", "unknown"),
+            "power": log_entry.get("power", "unknown"),
+            "fan_mode": log_entry.get("fan_mode", "unknown"),
+            "wind_power": log_entry.get("wind_power", "unknown"),
+            "color": log_entry.get("color", "unknown"),
+            "gesture": log_entry.get("gesture"), 
+            "voice" : log_entry.get("voice")
+        }
+    except:
+        return None
+
+# 입력 행 목록 -> 특징별 배열 (dict)
+def rows_to_columns(rows):
+    values = list(zip(*rows)) if len(rows) else [()] * len(FEATURES)
+    return {name: np.asarray(values[i], dtype=object) for i, name in enumerate(FEATURES)}
+
+def _numbers(values, dtype):
+    try:
+        return np.asarray(values, dtype=dtype)
+    except (TypeError, ValueError):
+        # 숫자가 아닌 값은 NaN (기타 열로 변환)
+        out = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return out.astype(dtype)
+
+
+class ContextEncoder:
+    def __init__(self, columns, vocabulary):
+        self.columns = list(columns)
+        self.vocabulary = vocabulary
+        self.offsets = []
+        self.sizes = []
+        offset = 0
+        for name in self.columns:
+            # 0번은 기타(unknown)
+            self.offsets.append(offset)
+            self.sizes.append(len(vocabulary[name]) + 1)
+            offset += len(vocabulary[name]) + 1
+        self.n_columns = offset
+        self._codes = {
+            name: {value: i + 1 for i, value in enumerate(vocabulary[name])} for name in CATEGORICAL
+        }
+
+    # 0 ~ size-1 범위 정수 특징 (범위 밖, 숫자 아님 -> 0)
+    def _range_codes(self, values, size):
+        values = _numbers(values, np.float64)
+        valid = np.isfinite(values) & (values >= 0) & (values < size)
+        return np.where(valid, np.nan_to_num(values) + 1, 0).astype(np.int32)
+
+    # 문자열 특징 : 고유값만 사전 조회 (추천 요청처럼 행이 적으면 바로 조회)
+    def _category_codes(self, name, values):
+        index = self._codes[name]
+        if len(values) <= 64:
+            return np.array([index.get(str(v), 0) for v in values], dtype=np.int32)
+        uniques, inverse = np.unique(np.asarray(values).astype(str), return_inverse=True)
+        return np.array([index.get(u, 0) for u in uniques], dtype=np.int32)[inverse.reshape(-1)]
+
+    # columns : {특징 이름: 배열} (FEATURES 8개)
+    # 반환 : (행 수, 열 수) 정수 배열, 각 값은 전체 열 번호
+    def transform_columns(self, columns):
+        n = len(columns["hour"])
+        hour = _numbers(columns["hour"], np.float64)
+        codes = {
+            "hour": self._range_codes(hour, 24),
+            "weekday": self._range_codes(columns["weekday"], 7)
+        }
+
+        temperature = _numbers(columns["temperature"], np.float64)
+        codes["temperature"] = np.where(np.isfinite(temperature), np.digitize(np.nan_to_num(temperature), TEMPERATURE_BINS) + 1, 0).astype(np.int32)
+
+        for name in CATEGORICAL:
+            codes[name] = self._category_codes(name, columns[name])
+
+        # (기기, 전원, 시간대) 모두 목록에 있을 때만 조합 열 사용
+        daypart = codes["hour"] - 1
+        known = (codes["device"] > 0) & (codes["power"] > 0) & (daypart >= 0)
+        situation = ((codes["device"] - 1) * len(POWERS) + (codes["power"] - 1)) * len(DAYPARTS) + daypart // 4 + 1
+        codes["situation"] = np.where(known, situation, 0).astype(np.int32)
+
+        X = np.empty((n, len(self.columns)), dtype=np.int32)
+        for j, name in enumerate(self.columns):
+            X[:, j] = self.offsets[j] + codes[name]
+        return X
+
+    # rows : [[hour, weekday, temperature, device, power, fan_mode, wind_power, color], ...]
+    def transform(self, rows):
+        return self.transform_columns(rows_to_columns(rows))
+
+    # 열 번호 배열 -> 희소 one-hot 행렬 (행마다 특징 수만큼 1, rf 모델 입력)
+    def one_hot(self, X):
+        n, k = X.shape
+        return sparse.csr_matrix(
+            (np.ones(n * k, dtype=np.float32), X.ravel(), np.arange(0, n * k + 1, k)),
+            shape=(n, self.n_columns)
+        )
+
+
+context_encoder = ContextEncoder(COLUMNS, VOCABULARY)
@@ -0,0 +1,41 @@
+import threading
+from functools import lru_cache
+from astral import Observer
+from astral.sun import sun
+from timezonefinder import TimezoneFinder
+import pytz
+
+DEFAULT_TIMEZONE = "Asia/Seoul"
+
+# 좌표별 시간대 / 날짜별 일출·일몰 메모이제이션
+# TimezoneFinder는 폴리곤 데이터를 읽어 생성 비용이 크므로 프로세스에서 하나만 사용
+_tf = None
+_tf_lock = threading.Lock()
+
+def get_timezone_finder():
+    global _tf
+    if _tf is None:
+        with _tf_lock:
+            if _tf is None:
+                _tf = TimezoneFinder(in_memory=True)
+    return _tf
+
+@lru_cache(maxsize=4096)
+def _timezone_at(lat, lon):
+    try:
+        return get_timezone_finder().timezone_at(lat=lat, lng=lon) or DEFAULT_TIMEZONE
+    except Exception:
+        return DEFAULT_TIMEZONE
+
+def timezone_at(lat, lon):
+    # 약 10m 단위로 반올림해 캐시 적중률 확보
+    return _timezone_at(round(lat, 4), round(lon, 4))
+
+@lru_cache(maxsize=4096)
+def _sun_times(lat, lon, tz_name, date):
+    s = sun(Observer(latitude=lat, longitude=lon), date=date, tzinfo=pytz.timezone(tz_name))
+    return s["sunrise"], s["sunset"]
+
+# (위치, 날짜)별 일출/일몰 시각
+def sun_times(lat, lon, tz_name, date):
+    return _sun_times(round(lat, 4), round(lon, 4), tz_name, date)
@@ -0,0 +1,198 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from firebase_admin import firestore
+from app.config import Config
+
+# firestore batch 최대 쓰기 수
+FIRESTORE_BATCH_LIMIT = 500
+
+# users/{uid} 문서의 로그 수 카운터 (로그 기록과 같은 batch에서 증가)
+LOG_COUNT_FIELD = "log_count"
+# 마지막 학습 이후 새 로그 여부 (학습 시작 시 False로 초기화)
+TRAIN_DIRTY_FIELD = "train_dirty"
+# 로그 문서의 firestore 기록 시각 (학습 데이터 증분 조회 기준, spool 재전송 로그도 포함되도록 서버 시각 사용)
+WRITTEN_AT_FIELD = "writtenAt"
+
+# 사용 로그 write-behind 기록기
+# - record_log는 큐에 넣기만 하고 바로 반환
+# - 백그라운드 스레드가 개수(batch_size) 또는 시간(flush_interval) 조건으로 batch 커밋
+# - firestore가 느리거나 연결되지 않으면 로컬 spool 파일(jsonl)에 이어 쓰고,
+#   재시작 또는 재시도 시점에 spool 파일을 다시 firestore로 보냄
+# - 로그 문서 id는 enqueue 시점에 정해 두고, 재전송 시에는 이미 기록된 문서(시간 초과였지만 실제로는
+#   커밋된 batch)를 빼고 기록 -> 로그 문서와 log_count 증가가 중복되지 않음
+class LogWriter:
+    def __init__(self, spool_path, max_queue, batch_size, flush_interval, commit_timeout, retry_interval):
+        self.spool_path = spool_path
+        self.batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT)
+        self.flush_interval = flush_interval
+        self.commit_timeout = commit_timeout
+        self.retry_interval = retry_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spool_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._firestore_db = None
+        self._thread = None
+        self._retry_at = 0
+
+    def start(self, firestore_db):
+        if self._thread is not None:
+            return
+        self._firestore_db = firestore_db
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def enqueue(self, uid, entry):
+        item = (uid, uuid.uuid4().hex, entry)
+
+        # 기록기가 시작되지 않은 경우 (예: 학습 스크립트) 바로 기록
+        if self._thread is None:
+            firestore_db = firestore.client()
+            batch = firestore_db.batch()
+            self._add_writes(firestore_db, batch, [item])
+            batch.commit()
+            return
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._spool([item])
+
+    def _run(self):
+        self._replay()
+
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stopped.is_set() or not self._queue.empty():
+            try:
+                pending.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if len(pending) >= self.batch_size or (pending and now >= deadline):
+                self._flush(pending)
+                pending = []
+            if now >= deadline:
+                deadline = now + self.flush_interval
+                if now >= self._retry_at and os.path.exists(self.spool_path):
+                    self._replay()
+
+        if pending:
+            self._flush(pending)
+
+    # 로그 문서 추가 + uid별 카운터 증가, 재학습 대상 표시
+    def _add_writes(self, firestore_db, batch, items):
+        counts = {}
+        users_ref = firestore_db.collection("users")
+        for uid, log_id, entry in items:
+            batch.set(users_ref.document(uid).collection("logs").document(log_id), {**entry, WRITTEN_AT_FIELD: firestore.SERVER_TIMESTAMP})
+            counts[uid] = counts.get(uid, 0) + 1
+        for uid, count in counts.items():
+            batch.set(users_ref.document(uid), {
+                LOG_COUNT_FIELD: firestore.Increment(count),
+                TRAIN_DIRTY_FIELD: True
+            }, merge=True)
+
+    # 이미 기록된 로그 제외 (재전송용, 문서 수만큼 읽기 발생)
+    def _unwritten(self, items):
+        users_ref = self._firestore_db.collection("users")
+        refs = [users_ref.document(uid).collection("logs").document(log_id) for uid, log_id, _ in items]
+        written = {snapshot.id for snapshot in self._firestore_db.get_all(refs) if snapshot.exists}
+        return [item for item in items if item[1] not in written]
+
+    def _commit(self, items, replay=False):
+        if replay:
+            items = self._unwritten(items)
+            if not items:
+                return
+        batch = self._firestore_db.batch()
+        self._add_writes(self._firestore_db, batch, items)
+        batch.commit(timeout=self.commit_timeout)
+
+    # batch 1개의 쓰기 수(로그 + 카운터 uid 수)가 한도를 넘지 않도록 분할
+    def _chunks(self, items):
+        start, uids = 0, set()
+        for i, (uid, _, _) in enumerate(items):
+            if (i - start) + len(uids) + (uid not in uids) > FIRESTORE_BATCH_LIMIT:
+                yield start, items[start:i]
+                start, uids = i, set()
+            uids.add(uid)
+        if start < len(items):
+            yield start, items[start:]
+
+    # replay : spool 재전송 (이전 시도에서 이미 기록되었을 수 있음)
+    def _flush(self, items, replay=False):
+        # 최근 실패 후 재시도 시각 전이면 firestore를 기다리지 않고 spool
+        if time.monotonic() < self._retry_at:
+            self._spool(items)
+            return
+
+        for i, chunk in self._chunks(items):
+            try:
+                self._commit(chunk, replay)
+            except Exception as e:
+                print(f"[log] firestore 기록 실패, spool 파일에 저장 ({len(items) - i}건): {e}")
+                self._retry_at = time.monotonic() + self.retry_interval
+                self._spool(items[i:])
+                return
+
+    def _spool(self, items):
+        with self._spool_lock:
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for uid, log_id, entry in items:
+                    f.write(json.dumps({"uid": uid, "id": log_id, "entry": entry}, ensure_ascii=False) + "\n")
+
+    # spool 파일 재전송
+    # 이름을 바꿔 둔 뒤 전송하고, 끝나면 삭제 (중간에 종료되면 다음 시작 시 다시 전송)
+    def _replay(self):
+        with self._spool_lock:
+            if os.path.exists(self.spool_path):
+                os.replace(self.spool_path, f"{self.spool_path}.{int(time.time() * 1000)}.replay")
+
+        self._retry_at = 0
+        for path in sorted(glob.glob(f"{glob.escape(self.spool_path)}.*.replay")):
+            items = []
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            record = json.loads(line)
+                            # id가 없는 이전 spool 파일은 새 id로 기록
+                            items.append((record["uid"], record.get("id") or uuid.uuid4().hex, record["entry"]))
+                        except (ValueError, KeyError):
+                            continue # 종료 중 잘린 줄
+            except FileNotFoundError:
+                continue # 다른 프로세스가 이미 처리함
+
+            if items:
+                print(f"[log] spool 파일 재전송: {path} ({len(items)}건)")
+                self._flush(items, replay=True)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+log_writer = LogWriter(
+    Config.LOG_SPOOL_PATH,
+    Config.LOG_QUEUE_SIZE,
+    Config.LOG_BATCH_SIZE,
+    Config.LOG_FLUSH_INTERVAL,
+    Config.LOG_COMMIT_TIMEOUT,
+    Config.LOG_RETRY_INTERVAL
+)
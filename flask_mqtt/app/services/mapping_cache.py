@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from firebase_admin import db
+from app.config import Config
+
+# uid별 제스처 매핑 캐시
+# - mode_gesture (firestore) : gesture -> device
+# - control_gesture (rtdb)   : mode -> gesture -> mapping
+# 최대 사용자 수를 넘으면 가장 오래 사용하지 않은 uid부터 제거(LRU)
+# 앱에서 직접 수정한 매핑도 반영되도록 TTL이 지나면 다시 불러옴
+# current_device는 앱/rtdb에서 바로 바뀔 수 있으므로 캐시하지 않고 매번 rtdb에서 조회
+# invalidate 전에 시작된 조회 결과는 저장하지 않음 (generation 비교, 매핑 수정은 드물어 전체 공통 번호 사용)
+class MappingCache:
+    def __init__(self, max_users, ttl):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0  # invalidate/clear 때마다 증가
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    # 모드(current_device) 변경 알림 등록 : fn(uid, device)
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def _load(self, firestore_db, uid):
+        mode_gestures = {}
+        mode_docs = firestore_db.collection("users").document(uid).collection("mode_gesture").stream()
+        for doc in mode_docs:
+            device = doc.to_dict().get("device")
+            if device:
+                mode_gestures[doc.id] = device
+
+        controls = db.reference(f"control_gesture/{uid}").get()
+
+        return {
+            "mode_gestures": mode_gestures,
+            "controls": controls if isinstance(controls, dict) else {},
+            "loaded_at": time.monotonic()
+        }
+
+    def get(self, firestore_db, uid):
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry and time.monotonic() - entry["loaded_at"] < self.ttl:
+                self._entries.move_to_end(uid)
+                return entry
+            generation = self._generation
+
+        # 캐시 미스 : lock 밖에서 조회 (다른 uid 요청을 막지 않도록)
+        entry = self._load(firestore_db, uid)
+
+        with self._lock:
+            # 조회 중에 매핑이 수정되었으면 이전 값일 수 있으므로 저장하지 않음
+            if generation != self._generation:
+                return entry
+            self._entries[uid] = entry
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_mode(self, firestore_db, uid, gesture):
+        return self.get(firestore_db, uid)["mode_gestures"].get(gesture)
+
+    # 현재 모드 (캐시하지 않고 rtdb에서 조회)
+    def get_current_device(self, uid):
+        return db.reference(f"user_info/{uid}/current_device").get()
+
+    def get_mapping(self, firestore_db, uid, mode, gesture):
+        mappings = self.get(firestore_db, uid)["controls"].get(mode)
+        if not isinstance(mappings, dict):
+            return None
+        return mappings.get(gesture)
+
+    # 엣지(인식기)용 라우팅 스냅샷 : 매핑 내용이 바뀔 때만 version이 바뀜
+    def snapshot(self, firestore_db, uid):
+        entry = self.get(firestore_db, uid)
+        controls = {}
+        for mode, mappings in entry["controls"].items():
+            if not isinstance(mappings, dict):
+                continue
+            controls[mode] = {
+                gesture: mapping.get("control")
+                for gesture, mapping in mappings.items()
+                if isinstance(mapping, dict) and mapping.get("control")
+            }
+
+        snapshot = {
+            "uid": uid,
+            "current_device": self.get_current_device(uid),
+            "mode_gestures": dict(entry["mode_gestures"]),
+            "controls": controls
+        }
+        raw = json.dumps(snapshot, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        snapshot["version"] = hashlib.sha1(raw).hexdigest()[:16]
+        return snapshot
+
+    # 모드 전환 (rtdb 기록 후 구독자에게 알림)
+    def set_current_device(self, uid, device):
+        db.reference(f"user_info/{uid}/current_device").set(device)
+
+        for fn in self._listeners:
+            try:
+                fn(uid, device)
+            except Exception as e:
+                print(f"[mapping] 모드 변경 알림 실패 ({uid}): {e}")
+
+    # 매핑 등록/수정 시 호출
+    def invalidate(self, uid):
+        with self._lock:
+            self._entries.pop(uid, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+mapping_cache = MappingCache(Config.MAPPING_CACHE_MAX_USERS, Config.MAPPING_CACHE_TTL)
@@ -0,0 +1,319 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import joblib
+from app.config import Config
+from app.services.compact_model import CompactModel
+from app.services.features import FEATURE_VERSION, context_encoder
+
+MODEL_KINDS = ("gesture", "voice")
+MODEL_BACKENDS = ("rf", "compact")
+
+MANIFEST_NAME = "manifest.json"
+# 새 버전 저장 후에도 남겨 둘 버전 수 (이전 manifest를 보고 읽는 중인 프로세스가 있을 수 있음)
+KEEP_VERSIONS = 2
+# {kind}_model.v{version}.npz / {kind}_encoder.pkl 등 (버전이 없으면 manifest 도입 전 파일, encoder는 이전 rf 모델)
+MODEL_FILE_PATTERN = re.compile(r"^(?:%s)_(?:model|encoder)(?:\.v(\d+))?\.(?:pkl|npz)$" % "|".join(MODEL_KINDS))
+
+
+# 버전별 모델 파일 이름 (encoder는 모든 모델이 고정 매핑 context_encoder를 공유하므로 저장하지 않음)
+#   rf      : {kind}_model.v{n}.pkl (RandomForest, 희소 one-hot 입력)
+#   compact : {kind}_model.v{n}.npz (빈도표 모델)
+# version이 None이면 manifest 도입 전 파일 (rf는 사용자별 OneHotEncoder를 함께 저장했음)
+def model_files(backend, kind, version=None):
+    if version is None:
+        if backend == "compact":
+            return {"model": f"{kind}_model.npz"}
+        return {"model": f"{kind}_model.pkl", "encoder": f"{kind}_encoder.pkl"}
+    return {"model": f"{kind}_model.v{version}.{'npz' if backend == 'compact' else 'pkl'}"}
+
+
+# 사용자별 추천 모델 레지스트리
+# - 학습 프로세스(train_worker.py)는 버전별 파일을 쓴 뒤 models/{uid}/manifest.json을 원자적으로 교체
+#   manifest : {"version", "backend", "feature_version", "created_at", "models": {kind: {"backend", "model"}}}
+#   버전별 파일은 쓰고 나면 바뀌지 않으므로 manifest 하나로 제스처/음성 모델이 항상 같은 버전으로 바뀜
+# - 서버 프로세스는 manifest의 version이 바뀌면 다음 요청에서 새 파일을 읽음
+#   manifest가 없으면 manifest 도입 전 파일({kind}_model.pkl 등)의 (mtime, size)를 버전으로 사용
+# - 읽은 모델은 메모리에 보관, 파일 크기 합계가 max_bytes를 넘으면 가장 오래 사용하지 않은 모델부터 제거(LRU)
+# - 사용자 1명의 저장은 한 프로세스에서만 (학습 큐가 uid당 실행 중인 작업을 1개로 제한)
+# - 특징 매핑(features.FEATURE_VERSION)이 다른 모델은 사용하지 않고 등록된 listener에 알림 (다시 학습 필요)
+class ModelRegistry:
+    def __init__(self, model_dir, max_bytes, backend):
+        if backend not in MODEL_BACKENDS:
+            raise ValueError(f"알 수 없는 모델 backend '{backend}'")
+        self.model_dir = model_dir
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (uid, kind) -> {"version", "model", "encoder", "size"}
+        self._manifests = {}  # uid -> (manifest 파일 stat, manifest)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._stats = {"hits": 0, "loads": 0, "evictions": 0, "stale": 0}
+        self._listeners = []
+
+    # 다시 학습이 필요한 모델 알림 등록 : fn(uid)
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def _notify_stale(self, uid):
+        for fn in self._listeners:
+            try:
+                fn(uid)
+            except Exception as e:
+                print(f"[model] {uid} 재학습 알림 실패: {e}")
+
+    def _user_dir(self, uid):
+        return os.path.join(self.model_dir, uid)
+
+    def _read_manifest(self, uid):
+        path = os.path.join(self._user_dir(uid), MANIFEST_NAME)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._manifests.get(uid)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"[model] {uid} manifest 읽기 실패 (다시 학습 필요): {e}")
+            return None
+
+        with self._lock:
+            # 메모리에 모델이 있는 사용자만 보관 (모델이 빠지면 _prune에서 제거)
+            if any((uid, kind) in self._entries for kind in MODEL_KINDS):
+                self._manifests[uid] = (key, manifest)
+        return manifest
+
+    # manifest 도입 전에 저장된 모델 파일
+    def _legacy_manifest(self, uid):
+        models, version = {}, []
+        for kind in MODEL_KINDS:
+            files = model_files(self.backend, kind)
+            try:
+                stats = [os.stat(os.path.join(self._user_dir(uid), name)) for name in files.values()]
+            except FileNotFoundError:
+                continue
+            models[kind] = {"backend": self.backend, **files}
+            version.extend((st.st_mtime_ns, st.st_size) for st in stats)
+        if not models:
+            return None
+        return {"version": tuple(version), "feature_version": None, "models": models}
+
+    # 현재 모델 manifest (모델이 없으면 None)
+    def manifest(self, uid):
+        return self._read_manifest(uid) or self._legacy_manifest(uid)
+
+    # manifest의 특징 매핑 버전이 현재와 같은지
+    # (feature_version 도입 전 manifest는 1, manifest 도입 전 모델(None)은 파일을 읽을 때 확인)
+    @staticmethod
+    def _current_features(manifest):
+        feature_version = manifest.get("feature_version", 1)
+        return feature_version is None or feature_version == FEATURE_VERSION
+
+    # 모델 버전 (없으면 None)
+    def version(self, uid, kind):
+        manifest = self.manifest(uid)
+        if manifest is None or kind not in manifest["models"]:
+            return None
+        return manifest["version"]
+
+    # 반환 : (model, encoder, 파일 크기 합계)
+    def _read(self, uid, info):
+        model_path = os.path.join(self._user_dir(uid), info["model"])
+        if info["backend"] == "compact":
+            return CompactModel.load(model_path), context_encoder, os.path.getsize(model_path)
+
+        model = joblib.load(model_path)
+        if info.get("encoder"):
+            # 사용자별 OneHotEncoder로 학습한 이전 모델
+            encoder_path = os.path.join(self._user_dir(uid), info["encoder"])
+            return model, joblib.load(encoder_path), os.path.getsize(model_path) + os.path.getsize(encoder_path)
+        if getattr(model, "n_features_in_", None) != context_encoder.n_columns:
+            raise ValueError(f"특징 매핑 버전이 다른 모델입니다: {model_path}")
+        return model, context_encoder, os.path.getsize(model_path)
+
+    def _load_lock(self, key):
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _cached(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["version"] == version:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+        return None
+
+    # (model, encoder) 반환, 모델이 없으면 (None, None)
+    def get(self, uid, kind):
+        key = (uid, kind)
+        try:
+            return self._get(uid, kind, key)
+        finally:
+            # 읽지 못한 경우 lock을 남기지 않음
+            with self._lock:
+                if key not in self._entries:
+                    self._prune(key)
+
+    def _get(self, uid, kind, key):
+        for _ in range(3):
+            manifest = self.manifest(uid)
+            info = manifest["models"].get(kind) if manifest else None
+            if info is None:
+                self._remove(key)
+                return None, None
+            version = manifest["version"]
+
+            entry = self._cached(key, version)
+            if entry:
+                return entry["model"], entry["encoder"]
+
+            # 같은 모델을 여러 요청이 동시에 읽지 않도록 모델별 lock
+            with self._load_lock(key):
+                entry = self._cached(key, version)
+                if entry:
+                    return entry["model"], entry["encoder"]
+
+                try:
+                    if not self._current_features(manifest):
+                        raise ValueError(f"특징 매핑 버전이 다른 모델입니다 (v{manifest.get('feature_version', 1)})")
+                    model, encoder, size = self._read(uid, info)
+                except FileNotFoundError:
+                    # 읽는 사이 새 버전이 저장되고 이전 버전 파일이 정리됨 -> manifest부터 다시 읽음
+                    continue
+                except ValueError as e:
+                    print(f"[model] {uid} {kind} 모델 읽기 실패 (다시 학습 필요): {e}")
+                    # 같은 버전은 다시 읽지 않도록 빈 모델로 보관, 새 버전이 저장되면 교체
+                    self._store(key, {"version": version, "model": None, "encoder": None, "size": 0})
+                    with self._lock:
+                        self._stats["stale"] += 1
+                    self._notify_stale(uid)
+                    return None, None
+
+                self._store(key, {"version": version, "model": model, "encoder": encoder, "size": size})
+                return model, encoder
+        return None, None
+
+    def _store(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._size -= old["size"]
+            self._entries[key] = entry
+            self._size += entry["size"]
+            self._stats["loads"] += 1
+
+            # 방금 읽은 모델은 예산을 넘더라도 유지
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._size -= evicted["size"]
+                self._stats["evictions"] += 1
+                self._prune(evicted_key)
+
+    # 메모리에서 빠진 모델의 lock, manifest 제거 (self._lock 안에서 호출, 사용 중인 lock은 유지)
+    def _prune(self, key):
+        lock = self._load_locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._load_locks[key]
+        uid = key[0]
+        if not any((uid, kind) in self._entries for kind in MODEL_KINDS):
+            self._manifests.pop(uid, None)
+
+    def _remove(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._size -= entry["size"]
+            self._prune(key)
+
+    def invalidate(self, uid):
+        for kind in MODEL_KINDS:
+            self._remove((uid, kind))
+
+    # 학습 결과 저장 : 새 버전 파일을 모두 쓴 뒤 manifest 교체, 반환 : 새 버전
+    # models : kind -> model
+    def save(self, uid, models):
+        user_dir = self._user_dir(uid)
+        os.makedirs(user_dir, exist_ok=True)
+        previous = self._read_manifest(uid)
+        version = previous["version"] + 1 if previous else 1
+
+        entries = {}
+        for kind, model in models.items():
+            files = model_files(self.backend, kind, version)
+            if self.backend == "compact":
+                atomic_write(os.path.join(user_dir, files["model"]), model.save)
+            else:
+                atomic_write(os.path.join(user_dir, files["model"]), lambda f: joblib.dump(model, f))
+            entries[kind] = {"backend": self.backend, **files}
+
+        manifest = {
+            "version": version,
+            "backend": self.backend,
+            "feature_version": FEATURE_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "models": entries
+        }
+        raw = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+        atomic_write(os.path.join(user_dir, MANIFEST_NAME), lambda f: f.write(raw))
+        self._cleanup(uid, version)
+        return version
+
+    # 오래된 버전 파일 정리 (최근 KEEP_VERSIONS개 버전만 유지)
+    def _cleanup(self, uid, version):
+        user_dir = self._user_dir(uid)
+        for name in os.listdir(user_dir):
+            match = MODEL_FILE_PATTERN.match(name)
+            if not match:
+                continue
+            file_version = match.group(1)
+            if file_version is None or int(file_version) <= version - KEEP_VERSIONS:
+                try:
+                    os.remove(os.path.join(user_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "models": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "backend": self.backend
+            }
+
+
+# 임시 파일에 쓴 뒤 교체 (읽는 쪽에서 쓰다 만 파일을 보지 않도록)
+# write : fn(파일 객체)
+def atomic_write(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+model_registry = ModelRegistry(Config.MODEL_DIR, Config.MODEL_CACHE_MAX_BYTES, Config.MODEL_BACKEND)
@@ -1,13 +1,193 @@
 import paho.mqtt.client as mqtt
 import json
+import threading
+import time
 from app.config import Config
 
-client = mqtt.Client()
-client.connect(Config.MQTT_BROKER, Config.MQTT_PORT)
-client.loop_start()
+METADATA_TOPIC = "smartHome/metadata"
+
+# unconfirmed : 전송 대기열(paho)에 들어갔지만 timeout 안에 전달 확인을 받지 못함 (qos > 0 이면 재연결 후에도 전송됨)
+class PublishResult:
+    def __init__(self, rc, mid=None, delivered=False, latency=None, error=None, unconfirmed=False):
+        self.rc = rc
+        self.mid = mid
+        self.delivered = delivered
+        self.latency = latency
+        self.error = error
+        self.unconfirmed = unconfirmed
+
+# MQTT 전송기
+# - 첫 전송 시 브로커에 연결 (앱 시작 시 브로커 장애로 멈추지 않도록), 끊기면 자동 재연결
+# - 동시에 전달을 기다리는 메시지 수를 max_inflight로 제한
+# - 메시지별로 브로커 전달(on_publish)을 publish_timeout까지 확인
+#   전달 확인은 기다리는 mid에만 반영, publish() 호출 중(mid 등록 전)에 온 확인만 잠시 보관
+#   (timeout 후 늦게 온 확인이 같은 mid를 다시 쓰는 다음 메시지의 전달로 처리되지 않도록)
+class MqttPublisher:
+    def __init__(self, host, port, qos, max_inflight, max_queued, publish_timeout, keepalive=60):
+        self.host = host
+        self.port = port
+        self.qos = qos
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.publish_timeout = publish_timeout
+        self.keepalive = keepalive
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._window = threading.BoundedSemaphore(max_inflight)
+        self._lock = threading.Lock()
+        self._waiting = {}        # mid -> Event
+        self._publishing = 0      # publish() 호출 후 아직 mid를 등록하지 않은 전송 수
+        self._completed = {}      # mid -> 확인 시각, 등록 전에 전달 완료된 mid
+        self._connected = False
+        self._stats = {
+            "published": 0,
+            "delivered": 0,
+            "failed": 0,
+            "timeout": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "disconnects": 0,
+            "latency_last_ms": None,
+            "latency_avg_ms": None,
+            "latency_max_ms": None
+        }
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+                client.on_connect = self._on_connect
+                client.on_disconnect = self._on_disconnect
+                client.on_publish = self._on_publish
+                client.max_inflight_messages_set(self.max_inflight)
+                client.max_queued_messages_set(self.max_queued)
+                client.reconnect_delay_set(min_delay=1, max_delay=30)
+                client.connect_async(self.host, self.port, self.keepalive)
+                client.loop_start()
+                self._client = client
+            return self._client
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        with self._lock:
+            if not reason_code.is_failure:
+                self._connected = True
+        print(f"[mqtt] 브로커 연결: {self.host}:{self.port} ({reason_code})")
+
+    def _on_disconnect(self, client, userdata, disconnect_flags, reason_code, properties):
+        with self._lock:
+            self._connected = False
+            self._stats["disconnects"] += 1
+        print(f"[mqtt] 브로커 연결 끊김, 재연결 시도 ({reason_code})")
+
+    def _on_publish(self, client, userdata, mid, reason_code, properties):
+        with self._lock:
+            event = self._waiting.get(mid)
+            if event:
+                event.set()
+            elif self._publishing:
+                self._completed[mid] = time.monotonic()
+            # 기다리는 전송이 없으면 버림 (timeout 후 늦게 온 확인)
+
+    # started : publish() 호출 직전 시각 (그 이전에 온 확인은 이전 메시지의 것)
+    def _wait_delivery(self, mid, timeout, started):
+        with self._lock:
+            self._publishing -= 1
+            acked_at = self._completed.pop(mid, None)
+            if not self._publishing:
+                self._completed.clear()
+            if acked_at is not None and acked_at >= started:
+                return True
+            event = self._waiting[mid] = threading.Event()
+
+        delivered = event.wait(timeout)
+
+        with self._lock:
+            self._waiting.pop(mid, None)
+        return delivered
+
+    def _record(self, key, latency=None):
+        with self._lock:
+            self._stats[key] += 1
+            if latency is not None:
+                ms = latency * 1000
+                avg = self._stats["latency_avg_ms"]
+                self._stats["latency_last_ms"] = ms
+                self._stats["latency_avg_ms"] = ms if avg is None else avg * 0.9 + ms * 0.1
+                self._stats["latency_max_ms"] = max(ms, self._stats["latency_max_ms"] or 0)
+
+    def _track_in_flight(self, delta):
+        with self._lock:
+            self._stats["in_flight"] += delta
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+
+    def publish(self, topic, payload, timeout=None):
+        timeout = self.publish_timeout if timeout is None else timeout
+        client = self._get_client()
+
+        if not self._window.acquire(timeout=timeout):
+            self._record("failed")
+            return PublishResult(mqtt.MQTT_ERR_QUEUE_SIZE, error="전송 대기 메시지가 너무 많습니다")
+
+        self._track_in_flight(1)
+        start = time.monotonic()
+        registering = True
+        with self._lock:
+            self._publishing += 1
+        try:
+            info = client.publish(topic, payload, qos=self.qos)
+            self._record("published")
+
+            # 연결되지 않은 상태라도 qos > 0 이면 재연결 후 전송되므로 전달을 기다림
+            queued = info.rc == mqtt.MQTT_ERR_SUCCESS or (info.rc == mqtt.MQTT_ERR_NO_CONN and self.qos > 0)
+            if not queued:
+                self._record("failed")
+                return PublishResult(info.rc, info.mid, error=mqtt.error_string(info.rc))
+
+            registering = False
+            if not self._wait_delivery(info.mid, timeout, start):
+                # paho 대기열에 남아 나중에 전달될 수 있으므로 실패가 아니라 확인 못 함으로 보고 (취소 API 없음)
+                self._record("timeout")
+                return PublishResult(
+                    mqtt.MQTT_ERR_AGAIN, info.mid,
+                    error=f"{timeout}초 안에 브로커 전달 확인 실패", unconfirmed=True
+                )
+
+            latency = time.monotonic() - start
+            self._record("delivered", latency)
+            return PublishResult(mqtt.MQTT_ERR_SUCCESS, info.mid, True, latency)
+        except Exception as e:
+            self._record("failed")
+            return PublishResult(mqtt.MQTT_ERR_UNKNOWN, error=str(e))
+        finally:
+            if registering:
+                with self._lock:
+                    self._publishing -= 1
+                    if not self._publishing:
+                        self._completed.clear()
+            self._track_in_flight(-1)
+            self._window.release()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "connected": self._connected,
+                "qos": self.qos,
+                "max_inflight": self.max_inflight,
+                "waiting": len(self._waiting)
+            }
+
+
+publisher = MqttPublisher(
+    Config.MQTT_BROKER,
+    Config.MQTT_PORT,
+    Config.MQTT_QOS,
+    Config.MQTT_MAX_INFLIGHT,
+    Config.MQTT_MAX_QUEUED,
+    Config.MQTT_PUBLISH_TIMEOUT
+)
 
 # metadata 전송
 def publish_metadata(metadata_dict):
     metadata_json = json.dumps(metadata_dict)
-    return client.publish("smartHome/metadata", metadata_json)
-    
\ No newline at end of file
+    return publisher.publish(METADATA_TOPIC, metadata_json)
@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+
+# 사용자별 추천 결과 캐시 (미리 계산)
+# - 조회는 저장된 결과를 그대로 반환, 처음 조회하는 사용자만 요청 경로에서 계산
+# - 기기 상태/매핑/모드가 바뀌면 mark_dirty -> debounce 후 백그라운드에서 다시 계산
+# - 시간 구간(시각, 일출/일몰, 기온)이 바뀌면 백그라운드에서 다시 계산
+# - active_window 동안 조회가 없던 사용자는 제거
+# - 다시 계산에 실패하면 debounce x 2^(실패 횟수) 후 재시도(최대 bucket_check), max_failures번 연속 실패하면 제거
+#
+# compute(uid) -> (응답 dict, 상태 코드, context) : app context 안에서 호출
+# bucket(context) -> 시간 구간 key : 값이 바뀌면 다시 계산
+class RecommendationCache:
+    def __init__(self, max_users, workers, debounce, bucket_check, active_window, max_failures):
+        self.max_users = max_users
+        self.max_failures = max_failures
+        self.debounce = debounce
+        self.bucket_check = bucket_check
+        self.active_window = active_window
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._uid_locks = {}
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recommend")
+        self._app = None
+        self._compute = None
+        self._bucket = None
+        self._thread = None
+
+    def start(self, app, compute, bucket):
+        if self._thread is not None:
+            return
+        self._app = app
+        self._compute = compute
+        self._bucket = bucket
+        self._thread = threading.Thread(target=self._run, name="recommend-refresh", daemon=True)
+        self._thread.start()
+
+    def _uid_lock(self, uid):
+        with self._lock:
+            return self._uid_locks.setdefault(uid, threading.Lock())
+
+    # 캐시에 없는 사용자의 lock 제거 (self._lock 안에서 호출, 사용 중인 lock은 유지)
+    def _prune_lock(self, uid):
+        lock = self._uid_locks.get(uid)
+        if uid not in self._entries and lock is not None and not lock.locked():
+            del self._uid_locks[uid]
+
+    # (응답 dict, 상태 코드) 반환
+    def get(self, uid):
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry:
+                entry["accessed_at"] = time.monotonic()
+                self._entries.move_to_end(uid)
+                return self._response(entry)
+
+        # 같은 uid의 첫 조회가 동시에 들어와도 한 번만 계산
+        try:
+            with self._uid_lock(uid):
+                with self._lock:
+                    entry = self._entries.get(uid)
+                if entry:
+                    return self._response(entry)
+                return self._refresh(uid)
+        finally:
+            # 실패 응답(캐시하지 않음)이면 lock도 남기지 않음
+            with self._lock:
+                self._prune_lock(uid)
+
+    def _response(self, entry):
+        payload = dict(entry["payload"])
+        payload["stale"] = entry["dirty_at"] is not None
+        return payload, entry["status"]
+
+    # 다시 계산해 (응답 dict, 상태 코드) 반환, 성공 응답만 캐시
+    def _refresh(self, uid):
+        started = time.monotonic()
+        with self._app.app_context():
+            payload, status, context = self._compute(uid)
+            if status != 200:
+                with self._lock:
+                    self._entries.pop(uid, None)
+                return payload, status
+            bucket = self._bucket(context)
+
+        now = time.monotonic()
+        entry = {
+            "payload": payload,
+            "status": status,
+            "context": context,
+            "bucket": bucket,
+            "checked_at": now,
+            "accessed_at": now,
+            "dirty_at": None,
+            "changed_at": None,
+            "failures": 0,
+            "retry_at": 0
+        }
+        with self._lock:
+            old = self._entries.get(uid)
+            if old:
+                entry["accessed_at"] = old["accessed_at"]
+                # 계산하는 동안 다시 변경된 경우 dirty 유지
+                if old["changed_at"] is not None and old["changed_at"] > started:
+                    entry["dirty_at"] = entry["changed_at"] = old["changed_at"]
+            self._entries[uid] = entry
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.max_users:
+                evicted, _ = self._entries.popitem(last=False)
+                self._prune_lock(evicted)
+        return self._response(entry)
+
+    # 상태/매핑 변경 알림 (캐시에 없는 사용자는 다음 조회 때 계산하므로 무시)
+    def mark_dirty(self, uid):
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry:
+                entry["changed_at"] = time.monotonic()
+                if entry["dirty_at"] is None:
+                    entry["dirty_at"] = entry["changed_at"]
+
+    def _refresh_async(self, uid):
+        with self._lock:
+            if uid in self._pending:
+                return
+            self._pending.add(uid)
+        self._executor.submit(self._refresh_task, uid)
+
+    def _refresh_task(self, uid):
+        try:
+            with self._uid_lock(uid):
+                self._refresh(uid)
+        except Exception as e:
+            print(f"[recommend] {uid} 추천 계산 실패: {e}")
+            with self._lock:
+                entry = self._entries.get(uid)
+                if entry:
+                    entry["failures"] += 1
+                    if entry["failures"] >= self.max_failures:
+                        # 계속 실패하는 사용자는 제거 (다음 조회 때 요청 경로에서 계산)
+                        del self._entries[uid]
+                    else:
+                        now = time.monotonic()
+                        entry["dirty_at"] = entry["dirty_at"] or now
+                        entry["retry_at"] = now + min(self.debounce * 2 ** entry["failures"], self.bucket_check)
+        finally:
+            with self._lock:
+                self._pending.discard(uid)
+                self._prune_lock(uid)
+
+    def _bucket_changed(self, entry):
+        try:
+            with self._app.app_context():
+                return self._bucket(entry["context"]) != entry["bucket"]
+        except Exception as e:
+            print(f"[recommend] 시간 구간 확인 실패: {e}")
+            return False
+
+    def _run(self):
+        while True:
+            time.sleep(min(1, self.debounce))
+            now = time.monotonic()
+            with self._lock:
+                for uid in [u for u, e in self._entries.items() if now - e["accessed_at"] > self.active_window]:
+                    del self._entries[uid]
+                    self._prune_lock(uid)
+                dirty = [
+                    u for u, e in self._entries.items()
+                    if e["dirty_at"] is not None and now - e["dirty_at"] >= self.debounce and now >= e["retry_at"]
+                ]
+                check = [
+                    (u, e) for u, e in self._entries.items()
+                    if e["dirty_at"] is None and now - e["checked_at"] >= self.bucket_check and now >= e["retry_at"]
+                ]
+
+            for uid in dirty:
+                self._refresh_async(uid)
+            for uid, entry in check:
+                entry["checked_at"] = now
+                if self._bucket_changed(entry):
+                    self._refresh_async(uid)
+
+
+recommendation_cache = RecommendationCache(
+    Config.RECOMMEND_MAX_USERS,
+    Config.RECOMMEND_WORKERS,
+    Config.RECOMMEND_DEBOUNCE,
+    Config.RECOMMEND_BUCKET_CHECK,
+    Config.RECOMMEND_ACTIVE_WINDOW,
+    Config.RECOMMEND_MAX_FAILURES
+)
@@ -0,0 +1,45 @@
+import json
+import threading
+
+# 인식기 WebSocket 연결 관리 (uid별)
+# 서버 -> 인식기 방향 알림(모드 변경 등)을 같은 연결로 전송
+class StreamConnection:
+    def __init__(self, ws):
+        self.ws = ws
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        with self._send_lock:
+            self.ws.send(json.dumps(message, ensure_ascii=False))
+
+class StreamHub:
+    def __init__(self):
+        self._conns = {}   # uid -> set[StreamConnection]
+        self._lock = threading.Lock()
+
+    def register(self, uid, conn):
+        with self._lock:
+            self._conns.setdefault(uid, set()).add(conn)
+
+    def unregister(self, conn):
+        with self._lock:
+            for uid in list(self._conns):
+                self._conns[uid].discard(conn)
+                if not self._conns[uid]:
+                    del self._conns[uid]
+
+    def broadcast(self, uid, message):
+        with self._lock:
+            conns = list(self._conns.get(uid, ()))
+        for conn in conns:
+            try:
+                conn.send(message)
+            except Exception:
+                self.unregister(conn)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(c) for c in self._conns.values())
+
+
+stream_hub = StreamHub()
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from app.config import Config
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS train_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    worker_pid INTEGER,
+    elapsed REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS train_jobs_queued_uid ON train_jobs(uid) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS train_jobs_status ON train_jobs(status, id);
+"""
+
+# 모델 학습 작업 큐 (로컬 SQLite 파일)
+# - 서버 프로세스는 학습 대상 uid를 넣기만 하고(enqueue), 학습은 별도 프로세스(train_worker.py)가 가져가 실행
+# - uid당 대기 중인 작업은 1개 (이미 대기 중이면 넣지 않음)
+# - 같은 uid의 작업이 실행 중이면 대기 작업은 끝날 때까지 가져가지 않음 (모델 저장이 겹치지 않도록)
+# - worker는 실행 중인 작업의 heartbeat를 주기적으로 갱신, lease 시간 동안 갱신이 없으면
+#   worker가 비정상 종료된 것으로 보고 다시 대기 상태로 돌림 (max_attempts회까지)
+# - 여러 프로세스가 같은 파일을 쓰므로 WAL 모드, 상태 변경은 BEGIN IMMEDIATE 트랜잭션
+class TrainQueue:
+    def __init__(self, path, lease, max_attempts, keep):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.keep = keep
+        self._local = threading.local()
+
+    # 스레드별 연결
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # 반환 : 새로 넣은 작업 수
+    def enqueue(self, uids):
+        now = time.time()
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO train_jobs (uid, status, enqueued_at) VALUES (?, ?, ?)",
+                [(uid, QUEUED, now) for uid in uids]
+            )
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    # 대기 작업을 최대 limit개 가져가 실행 중으로 표시, 반환 : [(job_id, uid)]
+    def claim(self, limit):
+        now = time.time()
+
+        def select(conn):
+            jobs = conn.execute(
+                "SELECT id, uid FROM train_jobs WHERE status = ? "
+                "AND uid NOT IN (SELECT uid FROM train_jobs WHERE status = ?) ORDER BY id LIMIT ?",
+                (QUEUED, RUNNING, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE train_jobs SET status = ?, started_at = ?, heartbeat_at = ?, worker_pid = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(RUNNING, now, now, os.getpid(), job_id) for job_id, _ in jobs]
+            )
+            return jobs
+
+        return self._transaction(select)
+
+    # 실행 중인 작업의 lease 연장
+    def heartbeat(self, job_ids):
+        now = time.time()
+
+        def update(conn):
+            conn.executemany(
+                "UPDATE train_jobs SET heartbeat_at = ? WHERE id = ? AND status = ?",
+                [(now, job_id, RUNNING) for job_id in job_ids]
+            )
+
+        self._transaction(update)
+
+    # results : job_id -> (status, 소요 시간), status는 DONE 또는 FAILED
+    def complete(self, results):
+        now = time.time()
+
+        def update(conn):
+            conn.executemany(
+                "UPDATE train_jobs SET status = ?, finished_at = ?, elapsed = ? WHERE id = ? AND status = ?",
+                [(status, now, elapsed, job_id, RUNNING) for job_id, (status, elapsed) in results.items()]
+            )
+
+        self._transaction(update)
+
+    # 실행 중인 작업을 다시 대기 상태로 (같은 uid의 대기 작업이 이미 있거나 재시도 횟수를 넘으면 실패 처리)
+    # running : [(job_id, uid, attempts)], 반환 : (다시 대기 상태로 돌린 작업 수, 재시도 횟수를 넘어 실패 처리한 uid 목록)
+    def _requeue(self, conn, running, now):
+        queued_uids = {uid for (uid,) in conn.execute("SELECT uid FROM train_jobs WHERE status = ?", (QUEUED,))}
+        requeued, failed = 0, []
+        for job_id, uid, attempts in running:
+            if uid in queued_uids or attempts >= self.max_attempts:
+                conn.execute("UPDATE train_jobs SET status = ?, finished_at = ? WHERE id = ?", (FAILED, now, job_id))
+                if uid not in queued_uids:
+                    failed.append(uid)
+                continue
+            conn.execute("UPDATE train_jobs SET status = ?, worker_pid = NULL WHERE id = ?", (QUEUED, job_id))
+            queued_uids.add(uid)
+            requeued += 1
+        return requeued, failed
+
+    # lease가 지난(종료된 worker가 남긴) 작업 복구 + 오래된 기록 삭제
+    # 반환 : (다시 대기 상태로 돌린 작업 수, 재시도 횟수를 넘어 실패 처리한 uid 목록)
+    def recover(self):
+        now = time.time()
+
+        def update(conn):
+            running = conn.execute(
+                "SELECT id, uid, attempts FROM train_jobs WHERE status = ? AND heartbeat_at < ?",
+                (RUNNING, now - self.lease)
+            ).fetchall()
+            result = self._requeue(conn, running, now)
+            conn.execute(
+                "DELETE FROM train_jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, now - self.keep)
+            )
+            return result
+
+        return self._transaction(update)
+
+    # 처리하지 못한 작업 반납 (worker 오류), 반환 : recover와 같음
+    def release(self, job_ids):
+        now = time.time()
+
+        def update(conn):
+            running = conn.execute(
+                "SELECT id, uid, attempts FROM train_jobs WHERE status = ? AND id IN (%s)" % ",".join("?" * len(job_ids)),
+                (RUNNING, *job_ids)
+            ).fetchall()
+            return self._requeue(conn, running, now)
+
+        return self._transaction(update)
+
+    def get_stats(self):
+        conn = self._connect()
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM train_jobs GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(enqueued_at) FROM train_jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+        return {
+            **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)},
+            "oldest_queued_sec": time.time() - oldest if oldest else None
+        }
+
+
+train_queue = TrainQueue(
+    Config.TRAIN_QUEUE_PATH,
+    Config.TRAIN_QUEUE_LEASE,
+    Config.TRAIN_QUEUE_MAX_ATTEMPTS,
+    Config.TRAIN_QUEUE_KEEP
+)
@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from app.config import Config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 사용자별 모델 학습 프로세스 풀
+# - 사용자 단위 작업(job(uid))을 여러 프로세스에 나눠 실행하고 진행 상황/사용자별 소요 시간 출력
+# - 작업마다 시간 제한(SIGALRM)과 메모리 제한(RLIMIT_AS, 작업 시작 시점 + memory_limit) 적용
+#   지원하지 않는 OS(Windows 등)에서는 제한 없이 실행
+# - gRPC(firestore)는 fork 후 사용할 수 없으므로 spawn 방식으로 프로세스를 만들고 firebase를 다시 초기화
+# - workers가 1이면 현재 프로세스에서 순차 실행
+#   main thread(train_worker.py 같은 학습 전용 프로세스)에서 실행하면 같은 제한 적용,
+#   다른 thread(서버 프로세스 등)에서는 SIGALRM을 쓸 수 없고 메모리 제한이 프로세스 전체에 걸리므로 제한 없음
+class TrainingExecutor:
+    def __init__(self, workers, timeout, memory_limit):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+
+    # 반환 : {"results": uid -> status, "timings": uid -> 초, "elapsed": 초}
+    def run(self, uids, job):
+        uids = list(uids)
+        start = time.monotonic()
+        results, timings = {}, {}
+
+        def report(uid, status, elapsed):
+            results[uid] = status
+            timings[uid] = elapsed
+            print(f"[train] {len(results)}/{len(uids)} {uid} : {status} ({elapsed:.1f}s)")
+
+        if self.workers == 1 or len(uids) <= 1:
+            limited = threading.current_thread() is threading.main_thread()
+            timeout, memory_limit = (self.timeout, self.memory_limit) if limited else (None, None)
+            for uid in uids:
+                report(uid, *_run_job(job, uid, timeout, memory_limit))
+        else:
+            self._run_pool(uids, job, report)
+
+        elapsed = time.monotonic() - start
+        counts = {}
+        for status in results.values():
+            counts[status] = counts.get(status, 0) + 1
+        slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:3]
+        print(f"[train] 완료 {len(uids)}명, {elapsed:.1f}s, {counts}, 가장 오래 걸린 사용자: {slowest}")
+        return {"results": results, "timings": timings, "elapsed": elapsed}
+
+    def _run_pool(self, uids, job, report):
+        context = multiprocessing.get_context("spawn")
+        workers = min(self.workers, len(uids))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = {pool.submit(_run_job, job, uid, self.timeout, self.memory_limit): uid for uid in uids}
+            done = set()
+            try:
+                for future in as_completed(futures):
+                    uid = futures[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        print(f"[train] {uid} 작업 실패: {e!r}")
+                        result = ("failed", 0.0)
+                    done.add(uid)
+                    report(uid, *result)
+            except BrokenProcessPool as e:
+                # 작업 프로세스가 비정상 종료(메모리 부족으로 kill 등)된 경우 남은 사용자는 실패 처리
+                print(f"[train] 학습 프로세스 비정상 종료: {e!r}")
+                for uid in uids:
+                    if uid not in done:
+                        report(uid, "failed", 0.0)
+
+
+def _init_worker():
+    from app import init_firebase
+    init_firebase()
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise JobTimeout("학습 시간 제한 초과")
+
+
+def _address_space():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# 작업 1개 실행 (시간/메모리 제한 적용), 반환 : (status, 소요 시간)
+def _run_job(job, uid, timeout, memory_limit):
+    start = time.monotonic()
+    use_alarm = timeout and hasattr(signal, "SIGALRM")
+    old_limit = None
+
+    if memory_limit and resource is not None and hasattr(resource, "RLIMIT_AS"):
+        current = _address_space()
+        if current is not None:
+            old_limit = resource.getrlimit(resource.RLIMIT_AS)
+            hard = old_limit[1]
+            soft = current + memory_limit
+            if hard != resource.RLIM_INFINITY:
+                soft = min(soft, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+    if use_alarm:
+        old_handler = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(int(timeout))
+    try:
+        status = job(uid)
+    except (JobTimeout, MemoryError) as e:
+        print(f"[train] {uid} 학습 중단: {e!r}")
+        status = "failed"
+    except Exception as e:
+        # 사용자 1명의 실패가 다른 사용자/worker에 영향을 주지 않도록 실패로 보고 (_run_pool과 같은 처리)
+        print(f"[train] {uid} 작업 실패: {e!r}")
+        status = "failed"
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, old_handler)
+        if old_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, old_limit)
+    return status, time.monotonic() - start
+
+
+training_executor = TrainingExecutor(Config.TRAIN_WORKERS, Config.TRAIN_JOB_TIMEOUT, Config.TRAIN_JOB_MEMORY_LIMIT)
@@ -0,0 +1,70 @@
+import threading
+import time
+from app.config import Config
+
+# 음성 명령 목록(voice_list) 캐시
+# - voice_list 컬렉션 전체를 한 번 읽어 메모리에 보관 (voice -> 문서 내용)
+# - start() 이후에는 firestore 실시간 리스너(on_snapshot)로 변경 사항을 바로 반영
+# - 리스너를 붙이지 못했거나 끊긴 경우 TTL이 지나면 다시 읽음
+class VoiceCatalog:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._voices = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+        self._watch = None
+
+    def start(self, firestore_db):
+        if self._watch is not None:
+            return
+        try:
+            self._watch = firestore_db.collection("voice_list").on_snapshot(self._on_snapshot)
+        except Exception as e:
+            print(f"[voice] voice_list 리스너 등록 실패, {self.ttl}초 주기로 다시 읽음: {e}")
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        voices = {doc.id: doc.to_dict() or {} for doc in docs}
+        with self._lock:
+            self._voices = voices
+            self._loaded_at = time.monotonic()
+
+    def _load(self, firestore_db):
+        voices = {doc.id: doc.to_dict() or {} for doc in firestore_db.collection("voice_list").stream()}
+        with self._lock:
+            self._voices = voices
+            self._loaded_at = time.monotonic()
+        return voices
+
+    def _is_fresh(self):
+        if self._voices is None:
+            return False
+        # 리스너가 살아 있으면 TTL과 관계없이 최신 상태
+        if self._watch is not None and getattr(self._watch, "is_active", True):
+            return True
+        return time.monotonic() - self._loaded_at < self.ttl
+
+    def all(self, firestore_db):
+        with self._lock:
+            if self._is_fresh():
+                return self._voices
+        return self._load(firestore_db)
+
+    # 음성 명령 문서 내용 (없으면 None)
+    def get(self, firestore_db, voice):
+        return self.all(firestore_db).get(voice)
+
+    def get_description(self, firestore_db, voice):
+        data = self.get(firestore_db, voice)
+        return data.get("description", voice) if data else voice
+
+    def invalidate(self):
+        with self._lock:
+            self._voices = None
+
+
+voice_catalog = VoiceCatalog(Config.VOICE_CATALOG_TTL)
@@ -0,0 +1,129 @@
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import Config
+
+DEFAULT_TEMPERATURE = 24.0
+
+# 도시별 현재 기온 캐시
+# - TTL 안의 값은 그대로 사용
+# - TTL이 지났지만 max_stale 안이면 이전 값을 바로 반환하고 백그라운드에서 갱신
+# - 최근 요청된(활성) 도시는 주기적으로 미리 갱신
+# API 호출 수는 요청 수가 아니라 도시 수에 비례
+class WeatherService:
+    def __init__(self, api_key, ttl, max_stale, timeout, refresh_interval, active_window):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.active_window = active_window
+
+        # 연결 재사용 세션
+        # - session : 요청 경로용 (geocoding, 캐시가 없을 때 조회), 재시도 없이 timeout 한 번만 대기
+        # - _retry_session : 백그라운드 갱신용, 실패 시 재시도
+        self.session = self._make_session(Retry(total=0))
+        self._retry_session = self._make_session(Retry(total=2, backoff_factor=0.3))
+
+        self._cache = {}        # city -> (temp, fetched_at)
+        self._active = {}       # city -> 마지막 요청 시각
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="weather")
+        self._refresher = None
+
+    @staticmethod
+    def _make_session(retry):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _fetch(self, city, session=None):
+        try:
+            response = (session or self.session).get("https://api.openweathermap.org/data/2.5/weather", params={
+                "q": city,
+                "appid": self.api_key,
+                "units": "metric"
+            }, timeout=self.timeout)
+            data = response.json()
+            temp = float(data["main"]["temp"])
+        except Exception as e:
+            print(f"[weather] {city} 기온 조회 실패: {e}")
+            return None
+
+        with self._lock:
+            self._cache[city] = (temp, time.monotonic())
+        return temp
+
+    def _refresh(self, city):
+        try:
+            self._fetch(city, self._retry_session)
+        finally:
+            with self._lock:
+                self._refreshing.discard(city)
+
+    def _refresh_async(self, city):
+        with self._lock:
+            if city in self._refreshing:
+                return
+            self._refreshing.add(city)
+        self._executor.submit(self._refresh, city)
+
+    def _ensure_refresher(self):
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name="weather-refresh", daemon=True)
+            self._refresher.start()
+
+    # 활성 도시 미리 갱신 (TTL 만료 전에 교체)
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            now = time.monotonic()
+            with self._lock:
+                for city in [c for c, t in self._active.items() if now - t > self.active_window]:
+                    del self._active[city]
+                    self._cache.pop(city, None)
+                due = [
+                    city for city in self._active
+                    if city not in self._cache or now - self._cache[city][1] > self.ttl - self.refresh_interval
+                ]
+            for city in due:
+                self._refresh_async(city)
+
+    def get_temperature(self, city):
+        now = time.monotonic()
+        with self._lock:
+            self._active[city] = now
+            entry = self._cache.get(city)
+            self._ensure_refresher()
+
+        if entry:
+            temp, fetched_at = entry
+            age = now - fetched_at
+            if age < self.ttl:
+                return temp
+            if age < self.max_stale:
+                self._refresh_async(city)
+                return temp
+
+        # 캐시가 없거나 너무 오래된 경우에만 요청 경로에서 조회 (한 번만 시도, 실패하면 백그라운드에서 재시도)
+        temp = self._fetch(city)
+        if temp is not None:
+            return temp
+        self._refresh_async(city)
+        return entry[0] if entry else DEFAULT_TEMPERATURE
+
+
+weather_service = WeatherService(
+    Config.OPENWEATHER_API_KEY,
+    Config.WEATHER_TTL,
+    Config.WEATHER_MAX_STALE,
+    Config.WEATHER_HTTP_TIMEOUT,
+    Config.WEATHER_REFRESH_INTERVAL,
+    Config.WEATHER_ACTIVE_WINDOW
+)
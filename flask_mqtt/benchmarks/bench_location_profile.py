@@ -0,0 +1,79 @@
+"""
+위치 프로필 마이크로벤치마크
+
+요청마다 TimezoneFinder()를 생성하고 sun()을 다시 계산하던 기존 방식과
+app/services/location_profile.py의 메모이제이션 방식을 요청 1건 기준으로 비교한다.
+
+실행 (flask_mqtt 디렉터리에서):
+    python -m benchmarks.bench_location_profile --iterations 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytz
+from astral import LocationInfo
+from astral.sun import sun
+from timezonefinder import TimezoneFinder
+
+from app.services import location_profile
+
+LAT, LON = 37.5665, 126.9780
+
+
+def legacy_request():
+    tz_name = TimezoneFinder().timezone_at(lat=LAT, lng=LON) or "Asia/Seoul"
+    location = LocationInfo("Seoul", "KR", tz_name, LAT, LON)
+    timezone = pytz.timezone(tz_name)
+    now = datetime.now(timezone)
+    s = sun(location.observer, date=now.date(), tzinfo=timezone)
+    return s["sunrise"], s["sunset"]
+
+
+def profile_request():
+    tz_name = location_profile.timezone_at(LAT, LON)
+    now = datetime.now(pytz.timezone(tz_name))
+    return location_profile.sun_times(LAT, LON, tz_name, now.date())
+
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], sum(samples) / len(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위치 프로필 (시간대 / 일출·일몰) 요청당 비용 비교")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    assert legacy_request() == profile_request(), "기존 방식과 결과가 다릅니다"
+
+    # 첫 호출(TimezoneFinder 생성, 캐시 채움) 비용은 따로 표시
+    start = time.perf_counter()
+    location_profile._timezone_at.cache_clear()
+    location_profile._sun_times.cache_clear()
+    profile_request()
+    warmup = (time.perf_counter() - start) * 1000
+
+    legacy_p50, legacy_avg = measure(legacy_request, args.iterations)
+    profile_p50, profile_avg = measure(profile_request, args.iterations)
+
+    print(f"{'':<20} {'p50 (ms)':>10} {'avg (ms)':>10}")
+    print(f"{'기존 (요청마다 생성)':<20} {legacy_p50:>10.3f} {legacy_avg:>10.3f}")
+    print(f"{'location_profile':<20} {profile_p50:>10.3f} {profile_avg:>10.3f}")
+    print(f"첫 호출 (초기화 포함): {warmup:.1f} ms")
+    print(f"요청당 절감: {legacy_avg - profile_avg:.3f} ms ({legacy_avg / max(profile_avg, 1e-9):.0f}배)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+추천 모델 backend 비교 벤치마크 (rf / compact)
+
+가상 사용자의 사용 로그(시간대, 기기 상태에 따라 제스처가 정해지고 일부는 무작위)를 만들어
+두 backend로 학습한 뒤 파일 크기, 로드 시간, 로드 메모리, 예측 지연, 정확도를 비교한다.
+저장/로드는 app/services/model_registry.py 경로를 그대로 사용한다.
+
+compact는 크기/로드/예측 지연이 rf보다 훨씬 작지만 정확도는 rf보다 낮다.
+(seed 42, 로그 100 / 300 / 1000건 : compact 0.33 / 0.47 / 0.67, rf 0.44 / 0.64 / 0.78)
+
+실행 (flask_mqtt 디렉터리에서):
+    python -m benchmarks.bench_models --rows 100,300,1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.routes.recommand import fit_model, predict_batch
+from app.services.features import context_encoder, rows_to_columns
+from app.services.model_registry import ModelRegistry, MODEL_BACKENDS
+
+DEVICES = ["light", "fan", "curtain", "tv"]
+GESTURES = ["thumbs_up", "thumbs_down", "small_heart", "spider_man", "clockwise", "counter_clockwise", "promise", "one"]
+
+
+def make_rows(n, noise, rng):
+    rows, labels = [], []
+    for _ in range(n):
+        hour = rng.randrange(24)
+        weekday = rng.randrange(7)
+        temp = round(rng.uniform(5, 35), 1)
+        device = rng.choice(DEVICES)
+        power = rng.choice(["on", "off"])
+        fan_mode = rng.choice(["normal", "natural", "sleep", "eco"]) if device == "fan" else "unknown"
+        wind_power = str(rng.randint(1, 12)) if device == "fan" else "unknown"
+        color = rng.choice(["전구색(Warm)", "주광색(Cool)", "주백색(Natural)"]) if device == "light" else "unknown"
+
+        # 생활 패턴 : 기기 + 시간대(4구간) + 전원 상태로 제스처 결정
+        label = GESTURES[(DEVICES.index(device) * 2 + hour // 6 + (power == "on")) % len(GESTURES)]
+        if rng.random() < noise:
+            label = rng.choice(GESTURES)
+
+        rows.append([hour, weekday, temp, device, power, fan_mode, wind_power, color])
+        labels.append(label)
+    return rows, labels
+
+
+def bench_backend(backend, train, test, repeats, model_dir):
+    X_train, y_train = train
+    X_test, y_test = test
+
+    start = time.perf_counter()
+    model = fit_model(context_encoder.transform_columns(rows_to_columns(X_train)), y_train, backend)
+    train_ms = (time.perf_counter() - start) * 1000
+
+    registry = ModelRegistry(model_dir, 1 << 40, backend)
+    registry.save("bench", {"gesture": model})
+    registry.get("bench", "gesture")
+    size = registry.get_stats()["bytes"]
+
+    # 로드 : 매번 새 레지스트리 (캐시 없음)
+    load_ms = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ModelRegistry(model_dir, 1 << 40, backend).get("bench", "gesture")
+        load_ms.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    model, encoder = ModelRegistry(model_dir, 1 << 40, backend).get("bench", "gesture")
+    _, memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # 예측 : 기기 수만큼(4행) 한 번에 (인코딩 포함)
+    batch = X_test[:len(DEVICES)]
+    predict_ms = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_batch(model, encoder, batch, context_encoder.transform(batch))
+        predict_ms.append((time.perf_counter() - start) * 1000)
+
+    predictions = predict_batch(model, encoder, X_test, context_encoder.transform(X_test))
+    accuracy = sum(p == y for p, y in zip(predictions, y_test)) / len(y_test)
+
+    return {
+        "backend": backend,
+        "train_ms": train_ms,
+        "size_kb": size / 1024,
+        "load_ms": sorted(load_ms)[len(load_ms) // 2],
+        "memory_kb": memory / 1024,
+        "predict_ms": sorted(predict_ms)[len(predict_ms) // 2],
+        "accuracy": accuracy
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 모델 backend 비교 (rf / compact)")
+    parser.add_argument("--rows", default="100,300,1000", help="학습 로그 수 (쉼표로 구분)")
+    parser.add_argument("--noise", type=float, default=0.2, help="패턴과 무관한 제스처 비율")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    test = make_rows(500, args.noise, rng)
+
+    header = f"{'rows':>6} {'backend':<8} {'train ms':>9} {'size KB':>9} {'load ms':>8} {'mem KB':>8} {'predict ms':>11} {'accuracy':>9}"
+    print(header)
+    print("-" * len(header))
+    for n in [int(r) for r in args.rows.split(",") if r.strip()]:
+        train = make_rows(n, args.noise, rng)
+        for backend in MODEL_BACKENDS:
+            r = bench_backend(backend, train, test, args.repeats, tempfile.mkdtemp(prefix="smartbridge-models-"))
+            print(
+                f"{n:>6} {r['backend']:<8} {r['train_ms']:>9.1f} {r['size_kb']:>9.1f} {r['load_ms']:>8.2f} "
+                f"{r['memory_kb']:>8.1f} {r['predict_ms']:>11.3f} {r['accuracy']:>9.3f}"
+            )
+    print(f"(정확도 : 무작위 라벨 비율 {args.noise:.0%} 인 테스트 로그 500건 기준, 최대 약 {1 - args.noise + args.noise / len(GESTURES):.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+라우트별 부하 테스트 / 지연 시간 벤치마크
+
+운영 Firebase, MQTT 브로커, OpenWeather 대신 benchmarks/fakes.py의 메모리 fake를 사용하고,
+백엔드별 호출 지연을 주입한 상태에서 가상 사용자 여러 명이 동시에 라우트를 호출한다.
+라우트별 처리량, 지연 시간 백분위(p50/p95/p99), 요청당 Firebase 왕복 수를 출력한다.
+
+실행 (flask_mqtt 디렉터리에서):
+    python -m benchmarks.bench_routes --users 50 --concurrency 16 --requests 500 \
+        --rtdb-latency 40 --firestore-latency 60 --http-latency 150
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import fakes
+
+ROUTES = ["gesture", "voice", "dashboard", "recommend"]
+
+
+def seed(backends, users):
+    """가상 사용자별 매핑 / 상태 / 음성 목록 데이터 생성"""
+    fs = backends.firestore
+    root = backends.rtdb.root
+
+    for gesture in ["small_heart", "thumbs_up", "thumbs_down", "spider_man", "clockwise", "counter_clockwise"]:
+        fs.docs[f"gesture_list/{gesture}"] = {"name": gesture}
+    for device, controls in {"light": ["power", "color"], "fan": ["power", "mode", "stronger", "weaker", "timer"]}.items():
+        for control in controls:
+            fs.docs[f"ir_codes/{device}_{control}"] = {"device": device, "control": control, "code": "0x00"}
+    for voice, description in {"light_on": "전등 켜기", "fan_on": "선풍기 켜기", "fan_mode": "선풍기 모드 변경"}.items():
+        fs.docs[f"voice_list/{voice}"] = {"description": description}
+
+    for i in range(users):
+        uid = f"bench-user-{i}"
+        fs.docs[f"users/{uid}"] = {"city": "Seoul", "country": "KR"}
+        fs.docs[f"users/{uid}/mode_gesture/small_heart"] = {"device": "light"}
+        fs.docs[f"users/{uid}/mode_gesture/spider_man"] = {"device": "fan"}
+        fs.docs[f"users/{uid}/control_gesture/light_power"] = {"device": "light", "gesture": "thumbs_up", "control": "power"}
+        fs.docs[f"users/{uid}/control_gesture/light_color"] = {"device": "light", "gesture": "thumbs_down", "control": "color"}
+        fs.docs[f"users/{uid}/control_gesture/fan_power"] = {"device": "fan", "gesture": "thumbs_up", "control": "power"}
+
+        root.setdefault("control_gesture", {})[uid] = {
+            "light": {"thumbs_up": {"control": "power"}, "thumbs_down": {"control": "color"}},
+            "fan": {"thumbs_up": {"control": "power"}}
+        }
+        root.setdefault("user_info", {})[uid] = {"current_device": "light"}
+        root.setdefault("status", {})[uid] = {
+            "light": {"power": "off", "log": {"color": "전구색(Warm)"}},
+            "fan": {"power": "off", "log": {"mode": "normal", "wind_power": "1", "timer": "0"}}
+        }
+
+
+def make_request(route, i, users):
+    uid = f"bench-user-{i % users}"
+    if route == "gesture":
+        gesture = "thumbs_up" if (i // users) % 2 == 0 else "thumbs_down"
+        return "post", "/gesture", {"uid": uid, "gesture": gesture}
+    if route == "voice":
+        return "post", "/voice", {"uid": uid, "voice": "fan_mode"}
+    if route == "dashboard":
+        path = ["/dashboard/unmapped_controls", "/dashboard/mapped_controls", "/dashboard/unmapped_gestures"][i % 3]
+        return "get", f"{path}?uid={uid}&mode=light", None
+    if route == "recommend":
+        return "get", f"/recommend_gesture_voice_auto?uid={uid}", None
+    raise ValueError(route)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round((len(values) - 1) * q)))]
+
+
+def wait_commands(command_ids, timeout=30):
+    """비동기 명령 전송 완료 대기 후 전달 지연(ms) 목록 반환"""
+    from app.services.command_sequencer import command_sequencer
+
+    deadline = time.monotonic() + timeout
+    delays = []
+    pending = set(command_ids)
+    while pending and time.monotonic() < deadline:
+        for command_id in list(pending):
+            status = command_sequencer.get_status(command_id)
+            if status is None or status["completedAt"]:
+                pending.discard(command_id)
+                if status:
+                    created = datetime.fromisoformat(status["createdAt"])
+                    completed = datetime.fromisoformat(status["completedAt"])
+                    delays.append((completed - created).total_seconds() * 1000)
+        time.sleep(0.01)
+    return delays
+
+
+def run_route(app, backends, route, args):
+    before = backends.stats.snapshot()
+    latencies = []
+    statuses = {}
+    command_ids = []
+
+    def call(i):
+        method, path, body = make_request(route, i, args.users)
+        client = app.test_client()
+        start = time.perf_counter()
+        response = getattr(client, method)(path, json=body) if body is not None else getattr(client, method)(path)
+        elapsed = (time.perf_counter() - start) * 1000
+        data = response.get_json(silent=True) or {}
+        return elapsed, response.status_code, data.get("command_id") if isinstance(data, dict) else None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for elapsed, status_code, command_id in pool.map(call, range(args.requests)):
+            latencies.append(elapsed)
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+            if command_id:
+                command_ids.append(command_id)
+    wall = time.perf_counter() - start
+
+    delivery = wait_commands(command_ids)
+    # 백그라운드 기록(상태 반영, 로그 batch)까지 포함해 집계
+    time.sleep(args.settle)
+    after = backends.stats.snapshot()
+    diff = {k: after[k] - before.get(k, 0) for k in after if after[k] - before.get(k, 0)}
+
+    return {
+        "route": route,
+        "requests": args.requests,
+        "statuses": statuses,
+        "throughput_rps": args.requests / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": max(latencies) if latencies else 0.0,
+        "delivery_p50_ms": percentile(delivery, 0.50) if delivery else None,
+        "delivery_p99_ms": percentile(delivery, 0.99) if delivery else None,
+        "rtdb_per_req": diff.get("rtdb", 0) / args.requests,
+        "firestore_per_req": diff.get("firestore", 0) / args.requests,
+        "firestore_reads_per_req": diff.get("firestore_reads", 0) / args.requests,
+        "http_per_req": diff.get("http", 0) / args.requests,
+        "mqtt_per_req": diff.get("mqtt", 0) / args.requests,
+        "calls": diff
+    }
+
+
+def print_report(results):
+    header = f"{'route':<10} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'deliv p99':>10} {'rtdb/req':>9} {'fs/req':>7} {'reads/req':>10} {'http/req':>9}  statuses"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        delivery = f"{r['delivery_p99_ms']:.1f}" if r["delivery_p99_ms"] is not None else "-"
+        print(
+            f"{r['route']:<10} {r['throughput_rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{delivery:>10} {r['rtdb_per_req']:>9.2f} {r['firestore_per_req']:>7.2f} {r['firestore_reads_per_req']:>10.2f} "
+            f"{r['http_per_req']:>9.2f}  {r['statuses']}"
+        )
+    print("(지연 시간 단위: ms, 왕복 수에는 요청 이후 백그라운드 기록도 포함)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartBridge 라우트 부하 테스트 (로컬 fake 백엔드)")
+    parser.add_argument("--routes", default=",".join(ROUTES), help=f"쉼표로 구분 ({','.join(ROUTES)})")
+    parser.add_argument("--users", type=int, default=20, help="가상 사용자 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--requests", type=int, default=200, help="라우트별 요청 수")
+    parser.add_argument("--rtdb-latency", type=float, default=30, help="RTDB 호출 지연 (ms)")
+    parser.add_argument("--firestore-latency", type=float, default=50, help="Firestore 호출 지연 (ms)")
+    parser.add_argument("--http-latency", type=float, default=150, help="외부 HTTP 호출 지연 (ms)")
+    parser.add_argument("--mqtt-latency", type=float, default=2, help="MQTT 브로커 전달 지연 (ms)")
+    parser.add_argument("--settle", type=float, default=3.0, help="라우트별 백그라운드 기록 대기 (초)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    backends = fakes.install({
+        "rtdb": args.rtdb_latency / 1000,
+        "firestore": args.firestore_latency / 1000,
+        "http": args.http_latency / 1000,
+        "mqtt": args.mqtt_latency / 1000
+    })
+    seed(backends, args.users)
+
+    # spool 파일 등 상대 경로 산출물이 저장소에 남지 않도록 임시 디렉터리에서 실행
+    os.chdir(tempfile.mkdtemp(prefix="smartbridge-bench-"))
+
+    from app import create_app
+    app = create_app()
+
+    results = []
+    for route in [r.strip() for r in args.routes.split(",") if r.strip()]:
+        print(f"[bench] {route} : {args.requests}건, 동시 {args.concurrency}")
+        results.append(run_route(app, backends, route, args))
+
+    print()
+    print_report(results)
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
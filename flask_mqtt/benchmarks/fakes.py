@@ -0,0 +1,469 @@
+"""
+벤치마크용 로컬 대체 구현 (Firebase RTDB / Firestore / MQTT / 외부 HTTP)
+
+운영 Firebase, 브로커, OpenWeather에 접근하지 않고 라우트를 실행하기 위한 메모리 기반 fake.
+모든 호출은 설정한 지연 시간만큼 sleep 하고 호출 수를 센다.
+install()은 app 패키지를 import 하기 전에 호출해야 한다.
+"""
+
+import copy
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+
+class CallStats:
+    """백엔드별 왕복 호출 수 / 지연 시간 설정"""
+
+    def __init__(self, latency=None):
+        self.latency = latency or {}
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def hit(self, backend, op):
+        with self._lock:
+            self.counts[backend] += 1
+            self.counts[f"{backend}.{op}"] += 1
+        delay = self.latency.get(backend, 0)
+        if delay:
+            time.sleep(delay)
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.counts)
+
+
+def _split(path):
+    return [p for p in str(path).strip("/").split("/") if p]
+
+
+# ---------------------------------------------------------------------------
+# Realtime Database
+# ---------------------------------------------------------------------------
+
+class FakeRealtimeDB:
+    def __init__(self, stats):
+        self.stats = stats
+        self.root = {}
+        self._lock = threading.RLock()
+
+    def reference(self, path="/"):
+        return FakeReference(self, _split(path))
+
+    def _get(self, parts):
+        node = self.root
+        for p in parts:
+            if not isinstance(node, dict) or p not in node:
+                return None
+            node = node[p]
+        return copy.deepcopy(node)
+
+    def _set(self, parts, value):
+        if not parts:
+            self.root = copy.deepcopy(value) if isinstance(value, dict) else {}
+            return
+        node = self.root
+        for p in parts[:-1]:
+            if not isinstance(node.get(p), dict):
+                node[p] = {}
+            node = node[p]
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = copy.deepcopy(value)
+
+
+class FakeReference:
+    def __init__(self, rtdb, parts):
+        self._rtdb = rtdb
+        self._parts = parts
+
+    @property
+    def key(self):
+        return self._parts[-1] if self._parts else None
+
+    def child(self, path):
+        return FakeReference(self._rtdb, self._parts + _split(path))
+
+    def get(self):
+        self._rtdb.stats.hit("rtdb", "get")
+        with self._rtdb._lock:
+            return self._rtdb._get(self._parts)
+
+    def set(self, value):
+        self._rtdb.stats.hit("rtdb", "set")
+        with self._rtdb._lock:
+            self._rtdb._set(self._parts, value)
+
+    def update(self, value):
+        self._rtdb.stats.hit("rtdb", "update")
+        with self._rtdb._lock:
+            for path, v in value.items():
+                self._rtdb._set(self._parts + _split(path), v)
+
+    def delete(self):
+        self._rtdb.stats.hit("rtdb", "delete")
+        with self._rtdb._lock:
+            self._rtdb._set(self._parts, None)
+
+
+# ---------------------------------------------------------------------------
+# Firestore
+# ---------------------------------------------------------------------------
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class FakeFirestore:
+    def __init__(self, stats):
+        self.stats = stats
+        self.docs = {}   # "col/doc/sub/doc" -> dict
+        self._lock = threading.RLock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def document(self, path):
+        parts = _split(path)
+        return FakeCollection(self, "/".join(parts[:-1])).document(parts[-1])
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def get_all(self, references):
+        self.stats.hit("firestore", "get_all")
+        for _ in references:
+            self.stats.hit("firestore_reads", "doc")
+        with self._lock:
+            return [FakeSnapshot(ref, copy.deepcopy(self.docs.get(ref.path))) for ref in references]
+
+    def _write(self, path, data, merge=False):
+        with self._lock:
+            current = self.docs.get(path)
+            data = _apply_transforms(current if merge else None, data)
+            if merge and current is not None:
+                current.update(data)
+            else:
+                self.docs[path] = data
+
+    def _children(self, collection_path):
+        prefix = collection_path + "/"
+        depth = len(_split(collection_path)) + 1
+        with self._lock:
+            return [
+                (path, copy.deepcopy(data)) for path, data in self.docs.items()
+                if path.startswith(prefix) and len(_split(path)) == depth
+            ]
+
+
+def _apply_transforms(current, data):
+    # firestore.Increment / SERVER_TIMESTAMP sentinel 처리
+    result = {}
+    for k, v in data.items():
+        if type(v).__name__ == "Increment":
+            base = (current or {}).get(k) or 0
+            result[k] = base + v.value
+        elif type(v).__name__ == "Sentinel" and "server timestamp" in repr(v):
+            result[k] = datetime.now(timezone.utc)
+        else:
+            result[k] = copy.deepcopy(v)
+    return result
+
+
+class FakeDocument:
+    def __init__(self, fs, path):
+        self._fs = fs
+        self.path = path
+        self.id = _split(path)[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._fs, f"{self.path}/{name}")
+
+    def get(self, *args, **kwargs):
+        self._fs.stats.hit("firestore", "get")
+        self._fs.stats.hit("firestore_reads", "doc")
+        with self._fs._lock:
+            return FakeSnapshot(self, copy.deepcopy(self._fs.docs.get(self.path)))
+
+    def set(self, data, merge=False):
+        self._fs.stats.hit("firestore", "set")
+        self._fs._write(self.path, data, merge)
+
+    def update(self, data):
+        self._fs.stats.hit("firestore", "update")
+        with self._fs._lock:
+            if self.path not in self._fs.docs:
+                raise KeyError(f"No document to update: {self.path}")
+        self._fs._write(self.path, data, merge=True)
+
+    def delete(self):
+        self._fs.stats.hit("firestore", "delete")
+        with self._fs._lock:
+            self._fs.docs.pop(self.path, None)
+
+
+class FakeQuery:
+    def __init__(self, collection, filters=(), order=None, limit=None):
+        self._collection = collection
+        self._filters = list(filters)
+        self._order = order
+        self._limit = limit
+
+    def where(self, field, op, value):
+        return FakeQuery(self._collection, self._filters + [(field, op, value)], self._order, self._limit)
+
+    def order_by(self, field, direction=None):
+        return FakeQuery(self._collection, self._filters, field, self._limit)
+
+    def limit(self, count):
+        return FakeQuery(self._collection, self._filters, self._order, count)
+
+    def _match(self, data):
+        ops = {
+            "==": lambda a, b: a == b,
+            "!=": lambda a, b: a != b,
+            ">": lambda a, b: a is not None and a > b,
+            ">=": lambda a, b: a is not None and a >= b,
+            "<": lambda a, b: a is not None and a < b,
+            "<=": lambda a, b: a is not None and a <= b,
+            "in": lambda a, b: a in b,
+        }
+        return all(ops[op](data.get(field), value) for field, op, value in self._filters)
+
+    def _results(self):
+        fs = self._collection._fs
+        rows = [(path, data) for path, data in fs._children(self._collection.path) if self._match(data)]
+        if self._order:
+            rows.sort(key=lambda r: (r[1].get(self._order) is None, r[1].get(self._order)))
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return [FakeSnapshot(FakeDocument(fs, path), data) for path, data in rows]
+
+    def stream(self, *args, **kwargs):
+        stats = self._collection._fs.stats
+        stats.hit("firestore", "query")
+        results = self._results()
+        # 실제 firestore와 같이 문서 수만큼 읽기 비용 발생 (왕복 수와 별도 집계)
+        for _ in results:
+            stats.hit("firestore_reads", "doc")
+        return iter(results)
+
+    def get(self, *args, **kwargs):
+        return list(self.stream())
+
+    def count(self, alias=None):
+        return FakeAggregation(self)
+
+
+class FakeAggregation:
+    def __init__(self, query):
+        self._query = query
+
+    def get(self, *args, **kwargs):
+        self._query._collection._fs.stats.hit("firestore", "count")
+        value = len(self._query._results())
+        return [[type("AggregationResult", (), {"alias": "count", "value": value})()]]
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, fs, path):
+        self._fs = fs
+        self.path = path
+        self.id = _split(path)[-1]
+        super().__init__(self)
+
+    def document(self, doc_id=None):
+        return FakeDocument(self._fs, f"{self.path}/{doc_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+    def on_snapshot(self, callback):
+        # 벤치마크에서는 최초 1회만 전달
+        callback(self._results(), [], None)
+        return type("Watch", (), {"unsubscribe": lambda self: None})()
+
+
+class FakeWriteBatch:
+    def __init__(self, fs):
+        self._fs = fs
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append((ref.path, data, merge))
+
+    def update(self, ref, data):
+        self._ops.append((ref.path, data, True))
+
+    def delete(self, ref):
+        self._ops.append((ref.path, None, False))
+
+    def commit(self, *args, **kwargs):
+        self._fs.stats.hit("firestore", "commit")
+        for path, data, merge in self._ops:
+            if data is None:
+                with self._fs._lock:
+                    self._fs.docs.pop(path, None)
+            else:
+                self._fs._write(path, data, merge)
+        self._ops = []
+
+
+# ---------------------------------------------------------------------------
+# MQTT (paho.mqtt.client.Client 대체)
+# ---------------------------------------------------------------------------
+
+class FakeReasonCode:
+    is_failure = False
+
+    def __str__(self):
+        return "Success"
+
+
+class FakeMessageInfo:
+    def __init__(self, mid, rc=0):
+        self.mid = mid
+        self.rc = rc
+        self._event = threading.Event()
+
+    def wait_for_publish(self, timeout=None):
+        self._event.wait(timeout)
+
+    def is_published(self):
+        return self._event.is_set()
+
+
+class FakeMqttClient:
+    stats = None
+    published = []
+    _mids = itertools.count(1)
+
+    def __init__(self, *args, **kwargs):
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_publish = None
+        self._connected = False
+
+    def max_inflight_messages_set(self, n):
+        pass
+
+    def max_queued_messages_set(self, n):
+        pass
+
+    def reconnect_delay_set(self, min_delay=1, max_delay=120):
+        pass
+
+    def connect(self, host, port=1883, keepalive=60):
+        self.connect_async(host, port, keepalive)
+
+    def connect_async(self, host, port=1883, keepalive=60):
+        self._connected = True
+        if self.on_connect:
+            self.on_connect(self, None, {}, FakeReasonCode(), None)
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        self._connected = False
+
+    def is_connected(self):
+        return self._connected
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        info = FakeMessageInfo(next(self._mids))
+        FakeMqttClient.published.append((topic, payload))
+
+        def deliver():
+            self.stats.hit("mqtt", "publish")
+            info._event.set()
+            if self.on_publish:
+                self.on_publish(self, None, info.mid, FakeReasonCode(), None)
+
+        threading.Thread(target=deliver, daemon=True).start()
+        return info
+
+
+# ---------------------------------------------------------------------------
+# 외부 HTTP (OpenWeather)
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+def fake_http_request(stats):
+    def request(session, method, url, params=None, **kwargs):
+        stats.hit("http", "geo" if "geo" in url else "weather")
+        if "geo/1.0/direct" in url:
+            return FakeResponse([{"lat": 37.5665, "lon": 126.9780, "country": "KR"}])
+        return FakeResponse({"main": {"temp": 28.5}})
+    return request
+
+
+# ---------------------------------------------------------------------------
+# 설치
+# ---------------------------------------------------------------------------
+
+class FakeBackends:
+    def __init__(self, stats, rtdb, firestore_db):
+        self.stats = stats
+        self.rtdb = rtdb
+        self.firestore = firestore_db
+
+
+def install(latency=None):
+    """firebase_admin / paho / requests를 fake로 교체 (app import 전에 호출)"""
+    import firebase_admin
+    from firebase_admin import credentials, db, firestore
+    import paho.mqtt.client as mqtt
+    import requests
+
+    stats = CallStats(latency)
+    rtdb = FakeRealtimeDB(stats)
+    firestore_db = FakeFirestore(stats)
+
+    credentials.Certificate = lambda *args, **kwargs: None
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+    db.reference = rtdb.reference
+    firestore.client = lambda *args, **kwargs: firestore_db
+
+    FakeMqttClient.stats = stats
+    mqtt.Client = FakeMqttClient
+
+    requests.sessions.Session.request = fake_http_request(stats)
+
+    return FakeBackends(stats, rtdb, firestore_db)
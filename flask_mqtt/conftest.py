@@ -0,0 +1 @@
+# pytest 실행 시 flask_mqtt 디렉터리를 import 경로에 추가 (app 패키지)
@@ -11,6 +11,10 @@ REM 2. Flask 서버 실행
 echo [2] Starting Flask server...
 start cmd /k "python run.py"
 
+REM 모델 학습 worker 실행 (서버는 학습 큐에 넣기만 함)
+echo [2-1] Starting training worker...
+start cmd /k "python train_worker.py"
+
 REM 3. 잠시 대기 후 ngrok 실행
 timeout /t 3 >nul
 
@@ -0,0 +1,54 @@
+import io
+import numpy as np
+import pytest
+from app.services.compact_model import CompactModel
+from app.services.features import context_encoder
+
+ROWS = [
+    [8, 0, 20.0, "light", "off", "unknown", "unknown", "전구색(Warm)"],
+    [8, 1, 21.0, "light", "off", "unknown", "unknown", "전구색(Warm)"],
+    [22, 2, 28.0, "fan", "on", "sleep", "3", "unknown"],
+    [23, 3, 29.0, "fan", "on", "sleep", "2", "unknown"],
+]
+LABELS = ["thumbs_up", "thumbs_up", "clockwise", "clockwise"]
+
+
+def test_fit_predict():
+    X = context_encoder.transform(ROWS)
+    model = CompactModel.fit(X, LABELS)
+
+    assert list(model.classes_) == ["clockwise", "thumbs_up"]
+    assert list(model.predict(X)) == LABELS
+    proba = model.predict_proba(X)
+    assert proba.shape == (len(ROWS), 2)
+    assert np.allclose(proba.sum(axis=1), 1)
+
+
+def test_save_load_roundtrip(tmp_path):
+    X = context_encoder.transform(ROWS)
+    model = CompactModel.fit(X, LABELS, alpha=0.5)
+    path = tmp_path / "model.npz"
+    model.save(str(path))
+
+    loaded = CompactModel.load(str(path))
+    assert loaded.alpha == 0.5
+    assert list(loaded.classes_) == list(model.classes_)
+    assert np.array_equal(loaded.counts, model.counts)
+    assert np.allclose(loaded.predict_proba(X), model.predict_proba(X))
+
+
+def test_load_rejects_other_feature_mapping(tmp_path):
+    path = tmp_path / "model.npz"
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        feature_version=0,
+        classes=np.array(["a"]),
+        counts=np.zeros((1, context_encoder.n_columns), dtype=np.int32),
+        class_counts=np.ones(1, dtype=np.int32),
+        alpha=1.0
+    )
+    path.write_bytes(buffer.getvalue())
+
+    with pytest.raises(ValueError):
+        CompactModel.load(str(path))
@@ -0,0 +1,91 @@
+import json
+import os
+import numpy as np
+from app.services.compact_model import CompactModel
+from app.services.features import context_encoder
+from app.services.model_registry import ModelRegistry, MANIFEST_NAME
+
+
+def make_model(label):
+    X = context_encoder.transform([[9, 0, 24.0, "light", "on", "normal", "1", "전구색(Warm)"]])
+    return CompactModel.fit(X, [label])
+
+
+def test_save_and_get_across_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path), 1024 * 1024, "compact")
+    assert registry.get("u1", "gesture") == (None, None)
+
+    assert registry.save("u1", {"gesture": make_model("one"), "voice": make_model("v")}) == 1
+    model, encoder = registry.get("u1", "gesture")
+    assert encoder is context_encoder
+    assert list(model.classes_) == ["one"]
+    assert registry.version("u1", "gesture") == 1
+
+    # 새 버전 저장 후 다음 조회에서 새 모델
+    assert registry.save("u1", {"gesture": make_model("two"), "voice": make_model("v")}) == 2
+    model, _ = registry.get("u1", "gesture")
+    assert list(model.classes_) == ["two"]
+    assert registry.manifest("u1")["version"] == 2
+    assert registry.get_stats()["loads"] == 2
+
+
+def test_cleanup_keeps_recent_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path), 1024 * 1024, "compact")
+    for label in ("a", "b", "c"):
+        registry.save("u1", {"gesture": make_model(label)})
+
+    files = sorted(os.listdir(tmp_path / "u1"))
+    assert files == ["gesture_model.v2.npz", "gesture_model.v3.npz", MANIFEST_NAME]
+
+
+def test_cleanup_removes_legacy_files(tmp_path):
+    user_dir = tmp_path / "u1"
+    user_dir.mkdir()
+    np.save(user_dir / "unrelated.npy", np.zeros(1))
+    (user_dir / "gesture_model.npz").write_bytes(b"")
+
+    registry = ModelRegistry(str(tmp_path), 1024 * 1024, "compact")
+    registry.save("u1", {"gesture": make_model("a")})
+    assert sorted(os.listdir(user_dir)) == ["gesture_model.v1.npz", MANIFEST_NAME, "unrelated.npy"]
+
+
+def test_eviction_prunes_locks_and_manifests(tmp_path):
+    registry = ModelRegistry(str(tmp_path), 1, "compact")
+    registry.save("u1", {"gesture": make_model("a")})
+    registry.save("u2", {"gesture": make_model("b")})
+
+    registry.get("u1", "gesture")
+    registry.get("u1", "gesture")  # manifest는 모델이 메모리에 있을 때만 보관
+    assert "u1" in registry._manifests
+
+    # 예산이 1바이트이므로 u2를 읽으면 u1이 제거됨
+    registry.get("u2", "gesture")
+    assert registry.get_stats()["evictions"] == 1
+    assert ("u1", "gesture") not in registry._load_locks
+    assert "u1" not in registry._manifests
+
+    # 모델이 없는 사용자는 lock을 남기지 않음
+    registry.get("missing", "gesture")
+    assert ("missing", "gesture") not in registry._load_locks
+
+
+def test_other_feature_version_needs_retraining(tmp_path):
+    registry = ModelRegistry(str(tmp_path), 1024 * 1024, "compact")
+    stale = []
+    registry.add_listener(stale.append)
+    registry.save("u1", {"gesture": make_model("a")})
+
+    # feature_version 도입 전 manifest (v1 특징 매핑)
+    path = tmp_path / "u1" / MANIFEST_NAME
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    del manifest["feature_version"]
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    assert registry.get("u1", "gesture") == (None, None)
+    assert registry.get("u1", "gesture") == (None, None)
+    assert stale == ["u1"]
+
+    # 다시 학습한 새 버전은 사용
+    registry.save("u1", {"gesture": make_model("b")})
+    model, _ = registry.get("u1", "gesture")
+    assert list(model.classes_) == ["b"]
@@ -0,0 +1,101 @@
+import time
+from app.services.train_queue import TrainQueue, QUEUED, RUNNING, DONE, FAILED
+
+
+def make_queue(tmp_path, lease=60, max_attempts=2, keep=3600):
+    return TrainQueue(str(tmp_path / "queue.sqlite3"), lease, max_attempts, keep)
+
+
+def expire(queue):
+    # 실행 중인 작업의 heartbeat를 lease 이전으로 돌림
+    queue._connect().execute("UPDATE train_jobs SET heartbeat_at = ? WHERE status = ?", (time.time() - queue.lease - 1, RUNNING))
+
+
+def test_one_queued_job_per_uid(tmp_path):
+    queue = make_queue(tmp_path)
+    assert queue.enqueue(["u1", "u2"]) == 2
+    assert queue.enqueue(["u1", "u3"]) == 1
+    assert queue.get_stats()[QUEUED] == 3
+
+
+def test_claim_skips_uid_already_running(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue(["u1", "u2"])
+    assert queue.claim(1) == [(1, "u1")]
+
+    # 실행 중인 uid는 다시 넣을 수 있지만 끝날 때까지 가져가지 않음
+    assert queue.enqueue(["u1"]) == 1
+    assert [uid for _, uid in queue.claim(10)] == ["u2"]
+    assert queue.claim(10) == []
+
+    queue.complete({1: (DONE, 0.5)})
+    assert [uid for _, uid in queue.claim(10)] == ["u1"]
+    stats = queue.get_stats()
+    assert (stats[QUEUED], stats[RUNNING], stats[DONE]) == (0, 2, 1)
+
+
+def test_recover_requeues_expired_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue(["u1"])
+    queue.claim(1)
+    assert queue.recover() == (0, [])
+
+    expire(queue)
+    assert queue.recover() == (1, [])
+    assert [uid for _, uid in queue.claim(1)] == ["u1"]
+
+
+def test_recover_heartbeat_keeps_job(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue(["u1"])
+    job_id, _ = queue.claim(1)[0]
+    expire(queue)
+    queue.heartbeat([job_id])
+    assert queue.recover() == (0, [])
+
+
+def test_recover_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue(["u1"])
+    for _ in range(2):
+        queue.claim(1)
+        expire(queue)
+        requeued, failed = queue.recover()
+    assert (requeued, failed) == (0, ["u1"])
+    assert queue.get_stats()[FAILED] == 1
+
+
+def test_recover_fails_duplicate_without_reporting(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue(["u1"])
+    queue.claim(1)
+    queue.enqueue(["u1"])  # 실행 중 새 로그로 다시 대기
+    expire(queue)
+
+    # 대기 작업이 이미 있으므로 실패 처리만 하고 다시 학습 대상으로 표시하지 않음
+    assert queue.recover() == (0, [])
+    stats = queue.get_stats()
+    assert (stats[QUEUED], stats[FAILED]) == (1, 1)
+
+
+def test_recover_deletes_old_records(tmp_path):
+    queue = make_queue(tmp_path, keep=10)
+    queue.enqueue(["u1"])
+    job_id, _ = queue.claim(1)[0]
+    queue.complete({job_id: (DONE, 0.1)})
+    queue._connect().execute("UPDATE train_jobs SET finished_at = ?", (time.time() - 11,))
+    queue.recover()
+    assert queue.get_stats()[DONE] == 0
+
+
+def test_release_requeues_until_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue(["u1", "u2"])
+    jobs = queue.claim(2)
+    assert queue.release([job_id for job_id, _ in jobs]) == (2, [])
+
+    jobs = queue.claim(2)
+    queue.enqueue(["u2"])  # u2는 새 작업이 이미 대기 중
+    assert queue.release([job_id for job_id, _ in jobs]) == (0, ["u1"])
+    stats = queue.get_stats()
+    assert (stats[QUEUED], stats[RUNNING], stats[FAILED]) == (1, 0, 2)
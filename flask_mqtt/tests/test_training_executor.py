@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+from app.services import training_executor as executor_module
+from app.services.training_executor import TrainingExecutor, _run_job
+
+needs_alarm = pytest.mark.skipif(not hasattr(executor_module.signal, "SIGALRM"), reason="SIGALRM 미지원 OS")
+
+
+def quick_job(uid):
+    return "trained"
+
+
+def slow_job(uid):
+    time.sleep(5)
+    return "trained"
+
+
+def test_run_job_returns_status():
+    status, elapsed = _run_job(quick_job, "u1", 5, None)
+    assert status == "trained"
+    assert elapsed < 1
+
+
+@needs_alarm
+def test_run_job_timeout():
+    status, elapsed = _run_job(slow_job, "u1", 1, None)
+    assert status == "failed"
+    assert elapsed < 3
+    # 제한 해제 후 다음 작업에 영향 없음
+    assert executor_module.signal.alarm(0) == 0
+
+
+@pytest.mark.skipif(executor_module.resource is None, reason="RLIMIT_AS 미지원 OS")
+def test_run_job_memory_limit():
+    def allocate(uid):
+        data = bytearray(512 * 1024 * 1024)
+        return "trained" if data else "skipped"
+
+    before = executor_module.resource.getrlimit(executor_module.resource.RLIMIT_AS)
+    status, _ = _run_job(allocate, "u1", None, 64 * 1024 * 1024)
+    assert status == "failed"
+    assert executor_module.resource.getrlimit(executor_module.resource.RLIMIT_AS) == before
+
+
+@needs_alarm
+def test_sequential_run_applies_timeout_in_main_thread():
+    summary = TrainingExecutor(1, 1, None).run(["u1"], slow_job)
+    assert summary["results"] == {"u1": "failed"}
+
+
+def test_sequential_run_without_limits_off_main_thread():
+    summaries = []
+    thread = threading.Thread(target=lambda: summaries.append(TrainingExecutor(1, 1, None).run(["u1", "u2"], quick_job)))
+    thread.start()
+    thread.join()
+    assert summaries[0]["results"] == {"u1": "trained", "u2": "trained"}
+
+
+def failing_job(uid):
+    raise RuntimeError("firestore unavailable")
+
+
+def test_run_job_reports_job_errors_as_failed():
+    status, _ = _run_job(failing_job, "u1", 5, None)
+    assert status == "failed"
+
+
+def test_single_uid_run_reports_job_errors():
+    summary = TrainingExecutor(4, 5, None).run(["u1"], failing_job)
+    assert summary["results"] == {"u1": "failed"}
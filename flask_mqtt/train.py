@@ -1,8 +1,15 @@
-from app import create_app
-from app.routes.recommand import train_model
+from firebase_admin import firestore
+from app import init_firebase
+from app.config import Config
+from app.services.train_queue import train_queue
+from train_worker import work
 
+# 전체 사용자 모델 학습
+# 학습 큐에 전체 사용자를 넣고 큐가 빌 때까지 처리 (train_worker.py가 실행 중이면 나눠서 처리)
 if __name__ == "__main__":
-    app = create_app()
+    init_firebase()
 
-    with app.app_context():
-        train_model()
\ No newline at end of file
+    uids = [doc.id for doc in firestore.client().collection("users").stream()]
+    added = train_queue.enqueue(uids)
+    print(f"전체 사용자 {len(uids)}명 학습 큐에 추가 ({added}명, 나머지는 이미 대기 중)")
+    work(Config.TRAIN_QUEUE_BATCH, Config.TRAIN_QUEUE_POLL_INTERVAL, once=True)
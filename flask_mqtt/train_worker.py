@@ -0,0 +1,106 @@
+import argparse
+import threading
+import time
+from firebase_admin import firestore
+from app import init_firebase
+from app.config import Config
+from app.routes.recommand import train_user_job
+from app.services.log_writer import TRAIN_DIRTY_FIELD
+from app.services.train_queue import train_queue, DONE, FAILED
+from app.services.training_executor import training_executor
+
+# 모델 학습 worker (서버와 별도 프로세스)
+# - 서버(run.py)의 스케줄러가 학습 큐(app/services/train_queue.py)에 넣은 사용자를 가져가 학습
+# - 학습한 모델은 models/{uid}에 버전별 파일 + manifest.json으로 저장, 서버는 manifest가 바뀌면 새 모델을 읽음
+#
+# 실행 (flask_mqtt 디렉터리에서):
+#     python train_worker.py            # 계속 실행
+#     python train_worker.py --once     # 대기 중인 작업만 처리하고 종료
+
+# 가져간 작업의 lease를 학습이 끝날 때까지 연장
+def keep_alive(job_ids, stopped):
+    while not stopped.wait(Config.TRAIN_QUEUE_LEASE / 4):
+        try:
+            train_queue.heartbeat(job_ids)
+        except Exception as e:
+            print(f"[worker] heartbeat 실패: {e}")
+
+
+# 학습하지 못한 사용자는 다음 검사에서 다시 큐에 추가
+def mark_dirty(uids):
+    users_ref = firestore.client().collection("users")
+    for uid in uids:
+        users_ref.document(uid).set({TRAIN_DIRTY_FIELD: True}, merge=True)
+
+
+def run_batch(jobs):
+    job_ids = [job_id for job_id, _ in jobs]
+    stopped = threading.Event()
+    heartbeat = threading.Thread(target=keep_alive, args=(job_ids, stopped), name="train-heartbeat", daemon=True)
+    heartbeat.start()
+    try:
+        summary = training_executor.run([uid for _, uid in jobs], train_user_job)
+    finally:
+        stopped.set()
+        heartbeat.join()
+
+    results = {}
+    for job_id, uid in jobs:
+        status = summary["results"].get(uid, "failed")
+        results[job_id] = (FAILED if status == "failed" else DONE, summary["timings"].get(uid, 0.0))
+    # 학습 프로세스가 비정상 종료된 사용자
+    mark_dirty([uid for _, uid in jobs if summary["results"].get(uid, "failed") == "failed"])
+    train_queue.complete(results)
+
+
+# 처리하지 못한 작업을 다시 대기 상태로 (재시도 횟수를 넘으면 실패 처리 후 다시 학습 대상으로 표시)
+def release(jobs):
+    try:
+        requeued, failed = train_queue.release([job_id for job_id, _ in jobs])
+        print(f"[worker] 작업 {requeued}건 다시 대기, {len(failed)}건 실패 처리")
+        mark_dirty(failed)
+    except Exception as e:
+        print(f"[worker] 작업 반납 실패 (lease가 지나면 다시 대기): {e!r}")
+
+
+# once : 대기 중인 작업이 없으면 종료
+def work(batch, poll, once=False):
+    while True:
+        jobs = []
+        try:
+            requeued, failed = train_queue.recover()
+            if requeued:
+                print(f"[worker] 중단된 작업 {requeued}건 다시 대기")
+            if failed:
+                # 재시도 횟수를 넘은 작업 (worker가 계속 비정상 종료)
+                print(f"[worker] 중단된 작업 {len(failed)}건 실패 처리")
+                mark_dirty(failed)
+
+            jobs = train_queue.claim(batch)
+            if jobs:
+                run_batch(jobs)
+                continue
+            if once:
+                return
+        except Exception as e:
+            # Firestore/큐 오류 : 가져간 작업을 반납하고 다음 주기에 다시 시도
+            print(f"[worker] 작업 처리 실패: {e!r}")
+            if jobs:
+                release(jobs)
+        time.sleep(poll)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartBridge 모델 학습 worker")
+    parser.add_argument("--once", action="store_true", help="대기 중인 작업만 처리하고 종료")
+    parser.add_argument("--batch", type=int, default=Config.TRAIN_QUEUE_BATCH, help="한 번에 가져갈 최대 작업 수")
+    parser.add_argument("--poll", type=float, default=Config.TRAIN_QUEUE_POLL_INTERVAL, help="대기 작업 확인 주기 (초)")
+    args = parser.parse_args()
+
+    init_firebase()
+    print(f"[worker] 학습 worker 시작 (큐: {train_queue.path}, 프로세스 {training_executor.workers}개)")
+    work(args.batch, args.poll, args.once)
+
+
+if __name__ == "__main__":
+    main()